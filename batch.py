@@ -0,0 +1,187 @@
+"""
+Renders many scene files to images over a process pool.
+
+    python batch.py tests/ "scenes/*.json" -o out/ [--format png]
+        [--workers 4] [--size 800x600] [--background 255,255,255]
+
+Every file is reported with its render time and the exceptions raised
+while rendering it; a failing file does not stop the batch.
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Sequence, Tuple
+import argparse
+import glob
+import os
+import sys
+import time
+
+from rasterizer.scanline.banded import default_workers
+from render import parse_color, parse_size, render_file
+
+
+def collect_scenes(paths: Sequence[str]) -> List[str]:
+    """
+    Expands directories to the JSON files directly inside them and other
+    arguments as glob patterns, dropping duplicates.
+    """
+    found: List[str] = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            found += sorted(glob.glob(os.path.join(path, "*.json")))
+        else:
+            found += sorted(glob.glob(path)) or [path]
+
+    return list(dict.fromkeys(found))
+
+
+def scene_root(scenes: Sequence[str]) -> str:
+    """
+    Returns the deepest directory holding every scene of `scenes`.
+    """
+    return os.path.commonpath(
+        [os.path.dirname(os.path.abspath(src)) for src in scenes]
+    )
+
+
+def output_path(src: str, outdir: str, fmt: str,
+                root: Optional[str] = None) -> str:
+    """
+    Names the image of `src` after its path relative to `root`, so scenes
+    of the same name in different directories do not overwrite each other.
+    """
+    if root is None:
+        root = os.path.dirname(os.path.abspath(src))
+
+    name = os.path.splitext(os.path.relpath(os.path.abspath(src), root))[0]
+    return os.path.join(outdir, "{}.{}".format(name, fmt))
+
+
+def _render_job(
+    src: str,
+    dst: str,
+    size: Optional[Tuple[int, int]],
+    background: Tuple[int, int, int, int]
+) -> Tuple[bool, List[Exception], float]:
+    start = time.perf_counter()
+
+    try:
+        ret, exc = render_file(src, dst, size, background)
+    except Exception as ex:
+        ret, exc = False, [ex]
+
+    return ret, exc, time.perf_counter() - start
+
+
+def render_batch(
+    jobs: Sequence[Tuple[str, str]],
+    size: Optional[Tuple[int, int]] = None,
+    background: Tuple[int, int, int, int] = (255, 255, 255, 255),
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None
+) -> Iterator[Tuple[str, str, bool, List[Exception], float]]:
+    """
+    Renders every (scene, image) pair of `jobs` in a process pool of
+    `workers` processes, or in `executor` when given, and yields
+    (scene, image, ok, exceptions, seconds) as the files complete.
+    """
+    if workers is None:
+        workers = default_workers()
+
+    pool = executor
+    if pool is None:
+        pool = ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        futures = {
+            pool.submit(_render_job, src, dst, size, background): (src, dst)
+            for src, dst in jobs
+        }
+
+        for future in as_completed(futures):
+            src, dst = futures[future]
+
+            try:
+                ret, exc, sec = future.result()
+            except Exception as ex:  # e.g. a worker died
+                ret, exc, sec = False, [ex], 0.0
+
+            yield src, dst, ret, exc, sec
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Render directories or globs of scene files."
+    )
+    parser.add_argument("scenes", nargs="+",
+                        help="scene directories, files or glob patterns")
+    parser.add_argument("-o", "--output", required=True,
+                        help="directory the images are written to")
+    parser.add_argument("-f", "--format", choices=("png", "ppm"),
+                        default="png")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("-s", "--size", type=parse_size,
+                        help="canvas size as WIDTHxHEIGHT "
+                             "(default: fit each scene)")
+    parser.add_argument("-b", "--background", type=parse_color,
+                        default=(255, 255, 255, 255),
+                        help="r,g,b[,a] or #rrggbb[aa] (default: white)")
+    args = parser.parse_args(argv)
+
+    scenes = collect_scenes(args.scenes)
+    if len(scenes) <= 0:
+        parser.error("no scene files found")
+
+    root = scene_root(scenes)
+    jobs: List[Tuple[str, str]] = []
+    owners = {}
+    failed = 0
+
+    for src in scenes:
+        dst = output_path(src, args.output, args.format, root)
+        key = os.path.normcase(os.path.abspath(dst))
+
+        # e.g. `s.json` and `s.JSON` on a case-insensitive file system
+        if key in owners:
+            failed += 1
+            print("FAIL {:9.3f} ms  {} -> {}".format(0.0, src, dst))
+            print("    ValueError: {} is also written by {}".format(
+                dst, owners[key]
+            ))
+            continue
+
+        owners[key] = src
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        jobs.append((src, dst))
+
+    busy = 0.0
+    start = time.perf_counter()
+
+    for src, dst, ret, exc, sec in render_batch(
+        jobs, args.size, args.background, args.workers
+    ):
+        busy += sec
+        failed += not ret
+
+        print("{} {:9.3f} ms  {} -> {}".format(
+            "ok  " if ret else "FAIL", sec * 1e3, src, dst
+        ))
+        for ex in exc:
+            print("    {}: {}".format(ex.__class__.__name__, ex))
+
+    wall = time.perf_counter() - start
+
+    print("{} files, {} failed, {:.3f} s wall, {:.3f} s rendering, "
+          "{:.1f} files/s".format(
+              len(scenes), failed, wall, busy, len(jobs) / max(wall, 1e-9)
+          ))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
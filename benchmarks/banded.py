@@ -0,0 +1,49 @@
+"""
+Banded rasterization time of a large outline against the number of worker
+processes.
+
+Run from the repository root: `python -m benchmarks.banded`
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from rasterizer.scanline.edge_table import EdgeTable
+from rasterizer.scanline.scanline import get_table_spans
+from rasterizer.scanline.banded import get_banded_spans
+
+from benchmarks.common import make_star_polygon, best_of, print_row
+
+
+def main() -> None:
+    table = EdgeTable.from_polygon(make_star_polygon(4000, 4000))
+    serial = best_of(lambda: list(get_table_spans(table)))
+
+    print("{} cores, serial: {:.2f} ms".format(
+        os.cpu_count(), serial * 1000
+    ))
+    print_row("workers", "bands", "time (ms)", "speedup")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        bands = workers * 4
+
+        # the pool is started once, outside of the timing
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(int, range(workers)))
+
+            banded = best_of(
+                lambda: get_banded_spans(table, bands, executor=pool)
+            )
+
+        print_row(
+            workers,
+            bands,
+            "{:.2f}".format(banded * 1000),
+            "{:.1f}x".format(serial / banded)
+        )
+
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from typing import Callable, List
+import math
+import random
+import time
+
+from primitives import Point
+from rasterizer.polygon_helper import PolygonHelper
+
+
+def make_star_polygon(n: int, radius: int = 0, seed: int = 0) \
+        -> PolygonHelper:
+    """
+    Generates a star-shaped polygon with `n` vertices whose radius jitters
+    between half and full `radius`, so most edges get a distinct `ymin`.
+    """
+    if radius <= 0:
+        radius = max(64, n)
+
+    rnd = random.Random(seed)
+    points: List[Point] = []
+
+    for i in range(n):
+        a = 2 * math.pi * i / n
+        r = rnd.randint(radius // 2, radius)
+        points.append(
+            Point(radius + round(r * math.cos(a)),
+                  radius + round(r * math.sin(a)))
+        )
+
+    return PolygonHelper(*points)
+
+
+def best_of(fn: Callable[[], object], repeat: int = 3) -> float:
+    """
+    Returns the best wall-clock time of `repeat` calls to `fn`, in seconds.
+    """
+    best = float("inf")
+
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+
+    return best
+
+
+def print_row(*cols) -> None:
+    print("".join("{:>14}".format(c) for c in cols))
@@ -0,0 +1,71 @@
+"""
+Rasterization time of regular polygons, through the general edge table
+rasterizer and the convex two-chain walker, and the time to classify them.
+
+Run from the repository root: `python -m benchmarks.convex`
+"""
+from typing import List
+import math
+
+from primitives import Point
+from rasterizer.polygon_helper import PolygonHelper
+from rasterizer.scanline.convex import ConvexTable, get_convex_rows
+from rasterizer.scanline.edge_table import EdgeTable
+from rasterizer.scanline.scanline import get_table_spans
+from rasterizer.span_cache import SpanCache
+
+from benchmarks.common import best_of, print_row
+
+
+def make_regular_polygon(n: int, radius: int) -> PolygonHelper:
+    points: List[Point] = [
+        Point(radius + round(radius * math.cos(2 * math.pi * i / n)),
+              radius + round(radius * math.sin(2 * math.pi * i / n)))
+        for i in range(n)
+    ]
+
+    return PolygonHelper(*points)
+
+
+def general(poly: PolygonHelper) -> SpanCache:
+    return SpanCache.from_spans(
+        get_table_spans(EdgeTable.from_polygon(poly))
+    )
+
+
+def walker(poly: PolygonHelper) -> SpanCache:
+    return SpanCache.from_rows(
+        *get_convex_rows(ConvexTable.from_polygon(poly))
+    )
+
+
+def classify(poly: PolygonHelper) -> None:
+    poly.mark_dirty()
+    poly.topology
+
+
+def main() -> None:
+    print_row(
+        "vertices", "radius", "general (ms)", "walker (ms)", "speedup",
+        "classify (ms)"
+    )
+
+    for n, radius in ((4, 40), (16, 200), (64, 1000), (1000, 1000)):
+        poly = make_regular_polygon(n, radius)
+
+        a = best_of(lambda: general(poly))
+        b = best_of(lambda: walker(poly))
+        c = best_of(lambda: classify(poly))
+
+        print_row(
+            n,
+            radius,
+            "{:.2f}".format(a * 1000),
+            "{:.2f}".format(b * 1000),
+            "{:.1f}x".format(a / b),
+            "{:.2f}".format(c * 1000)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Edge table construction time against vertex count.
+
+Run from the repository root: `python -m benchmarks.edge_table`
+"""
+from typing import List
+
+from rasterizer.scanline.raster_state import RasterState
+from rasterizer.scanline.edge_table import EdgeTable
+
+from benchmarks.common import make_star_polygon, best_of, print_row
+
+
+def legacy_scanline_bucket(poly):
+    """
+    The former parallel-list construction, kept for comparison.
+    """
+    bucket_idx: List[int] = []
+    bucket_val: List[List[RasterState]] = []
+
+    for e in poly.lines_iter():
+        dt = e.delta()
+
+        if dt.y == 0:
+            continue
+
+        if dt.y < 0:
+            e.swap_points()
+            dt.invert()
+
+        ymin = e.start.y
+
+        if ymin not in bucket_idx:
+            idx = 0
+            while idx < len(bucket_idx) and bucket_idx[idx] < ymin:
+                idx += 1
+
+            bucket_idx.insert(idx, ymin)
+            bucket_val.insert(idx, [])
+        else:
+            idx = bucket_idx.index(ymin)
+
+        bucket_val[idx].append(
+            RasterState(e, e.end.y, e.start.x, dt.x, dt.y)
+        )
+
+    return bucket_idx, bucket_val
+
+
+def main() -> None:
+    print_row("vertices", "buckets", "legacy (ms)", "table (ms)", "speedup")
+
+    for n in (250, 1000, 4000, 16000):
+        poly = make_star_polygon(n)
+
+        legacy = best_of(lambda: legacy_scanline_bucket(poly))
+        table = best_of(lambda: EdgeTable.from_polygon(poly).to_lists())
+
+        print_row(
+            n,
+            len(EdgeTable.from_polygon(poly)),
+            "{:.2f}".format(legacy * 1000),
+            "{:.2f}".format(table * 1000),
+            "{:.1f}x".format(legacy / table)
+        )
+
+
+if __name__ == "__main__":
+    main()
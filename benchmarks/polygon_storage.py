@@ -0,0 +1,121 @@
+"""
+Memory and edge table setup time of scenes totalling 100k vertices, with
+the points stored as a list of objects and as a coordinate array.
+
+Run from the repository root: `python -m benchmarks.polygon_storage`
+"""
+from typing import List
+import tracemalloc
+
+from rasterizer.polygon_helper import PolygonHelper
+from rasterizer.scanline.edge_table import EdgeTable
+
+from benchmarks.common import make_star_polygon, best_of, print_row
+
+
+class LegacyPoint:
+    """
+    The former dict-backed point, kept for comparison.
+    """
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class LegacyLine:
+    def __init__(self, x1, y1, x2, y2):
+        self.p1 = LegacyPoint(x1, y1)
+        self.p2 = LegacyPoint(x2, y2)
+
+    @property
+    def start(self):
+        return self.p1
+
+    @property
+    def end(self):
+        return self.p2
+
+
+def legacy_points(polys: List[PolygonHelper]) -> List[List[LegacyPoint]]:
+    return [
+        [LegacyPoint(p.x, p.y) for p in poly.points] for poly in polys
+    ]
+
+
+def legacy_edges(points: List[LegacyPoint]) -> List[LegacyLine]:
+    """
+    The former `lines_iter` edge table setup: a line and two points per
+    edge, then swapped so that it goes upwards.
+    """
+    edges = []
+    ln = len(points)
+
+    for i in range(ln):
+        a, b = points[i], points[(i + 1) % ln]
+        e = LegacyLine(a.x, a.y, b.x, b.y)
+
+        if e.p1.y == e.p2.y:
+            continue
+
+        if e.p1.y > e.p2.y:
+            e.p1, e.p2 = e.p2, e.p1
+
+        edges.append(e)
+
+    return edges
+
+
+def allocated(fn) -> int:
+    """
+    Returns the bytes still allocated by what `fn` returns.
+    """
+    tracemalloc.start()
+    kept = fn()  # noqa: F841
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size
+
+
+def main() -> None:
+    print_row("polygons", "legacy (KB)", "array (KB)", "ratio")
+
+    for n in (10, 100, 1000):
+        size = 100000 // n
+
+        legacy = allocated(lambda: legacy_points([
+            make_star_polygon(size, seed=i) for i in range(n)
+        ]))
+        compact = allocated(lambda: [
+            make_star_polygon(size, seed=i) for i in range(n)
+        ])
+
+        print_row(
+            n,
+            legacy // 1024,
+            compact // 1024,
+            "{:.1f}x".format(legacy / compact)
+        )
+
+    print()
+    print_row("polygons", "legacy (ms)", "table (ms)", "speedup")
+
+    for n in (10, 100, 1000):
+        size = 100000 // n
+        polys = [make_star_polygon(size, seed=i) for i in range(n)]
+        points = legacy_points(polys)
+
+        legacy = best_of(
+            lambda: [EdgeTable(legacy_edges(p)) for p in points]
+        )
+        table = best_of(lambda: [EdgeTable.from_polygon(p) for p in polys])
+
+        print_row(
+            n,
+            "{:.2f}".format(legacy * 1000),
+            "{:.2f}".format(table * 1000),
+            "{:.1f}x".format(legacy / table)
+        )
+
+
+if __name__ == "__main__":
+    main()
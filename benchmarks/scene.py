@@ -0,0 +1,56 @@
+"""
+Scene rasterization time against polygon count, one polygon at a time and
+in a single sweep.
+
+Run from the repository root: `python -m benchmarks.scene`
+"""
+import random
+
+from primitives import Point
+from rasterizer.polygon_factory import PolygonFactory
+
+from benchmarks.common import best_of, print_row
+
+
+def make_scene(n: int, seed: int = 0) -> PolygonFactory:
+    """
+    Scatters `n` small triangles and quads over a 2000x2000 canvas.
+    """
+    rnd = random.Random(seed)
+    factory = PolygonFactory()
+
+    for _ in range(n):
+        cx = rnd.randint(0, 2000)
+        cy = rnd.randint(0, 2000)
+        factory.create([
+            Point(cx + rnd.randint(-40, 40), cy + rnd.randint(-40, 40))
+            for _ in range(rnd.randint(3, 4))
+        ])
+
+    return factory
+
+
+def per_polygon(factory: PolygonFactory) -> None:
+    for p in factory:
+        p.update_cache()
+
+
+def main() -> None:
+    print_row("polygons", "each (ms)", "sweep (ms)", "speedup")
+
+    for n in (100, 1000, 5000):
+        factory = make_scene(n)
+
+        each = best_of(lambda: per_polygon(factory))
+        sweep = best_of(factory.update_all_cache)
+
+        print_row(
+            n,
+            "{:.2f}".format(each * 1000),
+            "{:.2f}".format(sweep * 1000),
+            "{:.1f}x".format(each / sweep)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Memory held by the span cache of a large polygon, as a `SpanCache` and as
+the list of tuples it replaced.
+
+Run from the repository root: `python -m benchmarks.span_cache`
+"""
+import sys
+
+from rasterizer.span_cache import SpanCache
+
+from benchmarks.common import make_star_polygon, print_row
+
+
+def list_bytes(spans) -> int:
+    return sys.getsizeof(spans) + sum(
+        sys.getsizeof(s) + sum(sys.getsizeof(i) for i in s) for s in spans
+    )
+
+
+def main() -> None:
+    print_row("vertices", "rows", "spans", "list (KiB)", "cache (KiB)",
+              "ratio")
+
+    for n in (64, 1000, 4000):
+        poly = make_star_polygon(n, radius=2000)
+        poly.update_cache()
+        cache = poly.cachedLines
+
+        spans = [tuple(s) for s in cache]
+        size = cache.memory_usage()
+
+        print_row(
+            n,
+            size["rows"],
+            size["spans"],
+            "{:.1f}".format(list_bytes(spans) / 1024),
+            "{:.1f}".format(size["total"] / 1024),
+            "{:.1f}x".format(list_bytes(spans) / size["total"])
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Per-scanline edge stepping time against edge slope.
+
+Run from the repository root: `python -m benchmarks.stepping`
+"""
+from rasterizer.scanline.raster_state import RasterState
+
+from benchmarks.common import best_of, print_row
+
+
+ROWS = 200
+EDGES = 50
+
+
+def legacy_step(st: RasterState) -> None:
+    """
+    The former stepping loop, one iteration per pixel of horizontal run.
+    """
+    st.remainder += st.dx
+
+    if st.dx >= 0:
+        while 2 * st.remainder >= st.dy:
+            st.x += 1
+            st.remainder -= st.dy
+    else:
+        while -2 * st.remainder >= st.dy:
+            st.x -= 1
+            st.remainder += st.dy
+
+
+def walk(dx: int, step) -> list:
+    """
+    Steps `EDGES` edges of slope `ROWS / dx` over every one of their rows
+    and returns the `x` of each row.
+    """
+    xs = []
+
+    for _ in range(EDGES):
+        st = RasterState(None, ROWS, 0, dx, ROWS)
+
+        for _ in range(ROWS):
+            xs.append(st.x)
+            step(st)
+
+    return xs
+
+
+def main() -> None:
+    print_row("dx / dy", "legacy (ms)", "closed (ms)", "speedup")
+
+    for dx in (0, 20, -100, 200, -1000, 2000, 20000):
+        if walk(dx, legacy_step) != walk(dx, RasterState.step):
+            raise AssertionError("stepping differs for dx = {}".format(dx))
+
+        legacy = best_of(lambda: walk(dx, legacy_step))
+        closed = best_of(lambda: walk(dx, RasterState.step))
+
+        print_row(
+            "{:g}".format(dx / ROWS),
+            "{:.2f}".format(legacy * 1000),
+            "{:.2f}".format(closed * 1000),
+            "{:.1f}x".format(legacy / closed)
+        )
+
+
+if __name__ == "__main__":
+    main()
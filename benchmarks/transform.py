@@ -0,0 +1,65 @@
+"""
+Transform-all time against polygon count, one polygon at a time through
+`transformPolygon` and batched through `transformPolygons`, then a chain of
+ten transforms rasterized after each one against rasterized once at the end.
+
+Run from the repository root: `python -m benchmarks.transform`
+"""
+from helpers.polygon_transformation_helper import getRotationMatrix, \
+    transformPolygon, transformPolygons
+
+from benchmarks.common import best_of, print_row
+from benchmarks.scene import make_scene
+
+
+def per_polygon(factory, M) -> None:
+    for p in factory:
+        transformPolygon(M, p)
+        p.update_cache()
+
+
+def main() -> None:
+    print_row("polygons", "each (ms)", "batched (ms)", "speedup")
+    M = getRotationMatrix(15)
+
+    for n in (100, 1000, 10000):
+        each_scene = make_scene(n)
+        each_scene.update_all_cache()
+        batch_scene = make_scene(n)
+        batch_scene.update_all_cache()
+
+        each = best_of(lambda: per_polygon(each_scene, M))
+        batch = best_of(lambda: transformPolygons(M, batch_scene))
+
+        print_row(
+            n,
+            "{:.2f}".format(each * 1000),
+            "{:.2f}".format(batch * 1000),
+            "{:.1f}x".format(each / batch)
+        )
+
+    print()
+    print_row("polygons", "eager (ms)", "lazy (ms)", "speedup")
+
+    for n in (100, 1000):
+        scene = make_scene(n)
+        scene.update_all_cache()
+
+        def chain(rasterize: bool) -> None:
+            for _ in range(10):
+                transformPolygons(M, scene, rasterize=rasterize)
+            scene.update_all_cache()
+
+        eager = best_of(lambda: chain(True))
+        lazy = best_of(lambda: chain(False))
+
+        print_row(
+            n,
+            "{:.2f}".format(eager * 1000),
+            "{:.2f}".format(lazy * 1000),
+            "{:.1f}x".format(eager / lazy)
+        )
+
+
+if __name__ == "__main__":
+    main()
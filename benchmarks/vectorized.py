@@ -0,0 +1,48 @@
+"""
+Pure-Python scanline rasterizer against the vectorized NumPy engine.
+
+Run from the repository root: `python -m benchmarks.vectorized`
+"""
+from rasterizer.scanline.scanline import get_scanline_bucket, \
+    get_raster_lines
+from rasterizer.scanline.vectorized import get_raster_spans_vectorized, \
+    polygon_to_array
+
+from benchmarks.common import make_star_polygon, best_of, print_row
+
+
+def python_spans(poly):
+    spans = []
+    prev = None
+
+    for x, y in get_raster_lines(*get_scanline_bucket(poly)):
+        if prev is None:
+            prev = x
+        else:
+            spans.append((y, prev, x))
+            prev = None
+
+    return spans
+
+
+def main() -> None:
+    print_row("rows", "vertices", "python (ms)", "numpy (ms)", "speedup")
+
+    for radius in (100, 400, 1600, 6400):
+        poly = make_star_polygon(64, radius=radius)
+        vertices = polygon_to_array(poly)
+
+        python = best_of(lambda: python_spans(poly))
+        numpy = best_of(lambda: get_raster_spans_vectorized(vertices))
+
+        print_row(
+            2 * radius,
+            len(poly.points),
+            "{:.2f}".format(python * 1000),
+            "{:.2f}".format(numpy * 1000),
+            "{:.1f}x".format(python / numpy)
+        )
+
+
+if __name__ == "__main__":
+    main()
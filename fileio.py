@@ -167,7 +167,7 @@ class FileIO:
     def createObjectFromPolygonHelper(obj: PolygonHelper) -> object:
         return {
             "name": obj.name,
-            "points": [(p.x, p.y) for p in obj.points],
+            "points": list(zip(obj.coords[0::2], obj.coords[1::2])),
             "fillColor": obj.fillColor,
             "outlineColor": obj.outlineColor,
             "outlineThickness": obj.outlineThickness
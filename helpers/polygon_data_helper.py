@@ -49,8 +49,9 @@ class PolygonDataHelper(QObject):
     def getPolygon(self, idx: int) -> Optional[PolygonHelper]:
         return self.polygonFactory.get(idx)
 
-    def updateAllPolygonCache(self) -> List[Exception]:
-        return self.polygonFactory.update_all_cache()
+    def updateAllPolygonCache(self, storeCache: bool = False) \
+            -> List[Exception]:
+        return self.polygonFactory.update_all_cache(storeCache=storeCache)
 
     def removePolygon(self, poly: PolygonHelper) -> bool:
         if poly in self.polygonFactory:
@@ -1,7 +1,8 @@
-from typing import Tuple
+from typing import List, Optional, Tuple
 import math
 
-from rasterizer.polygon_helper import PolygonHelper
+from rasterizer.polygon_helper import PolygonHelper, materialize_points
+from rasterizer.polygon_factory import PolygonFactory
 
 
 Matrix33 = Tuple[
@@ -72,13 +73,57 @@ def getSheeringMatrix(h, v) -> None:
     )
 
 
+def getTranslationOf(M: Matrix33) -> Optional[Tuple[int, int]]:
+    """
+    Returns the offset of a matrix that only translates by whole pixels,
+    or None for any other matrix.
+    """
+    if M[0][0] != 1 or M[0][1] != 0 or M[0][2] != 0 or \
+            M[1][0] != 0 or M[1][1] != 1 or M[1][2] != 0 or M[2][2] != 1:
+        return None
+
+    dx, dy = M[2][0], M[2][1]
+    if dx != int(dx) or dy != int(dy):
+        return None
+
+    return int(dx), int(dy)
+
+
 def transformPolygon(transformationMatrix: Matrix33, polygon: PolygonHelper) \
      -> None:
     M = transformationMatrix
 
-    for p in polygon.points:
-        x = p.x
-        y = p.y
+    # whole pixel moves shift the cached spans along with the points
+    offset = getTranslationOf(M)
+    if offset is not None:
+        polygon.translate(*offset)
+        return
+
+    # composed lazily, the points are rounded once when next read
+    polygon.transform_by(M)
+
+
+def transformPolygons(transformationMatrix: Matrix33,
+                      polygonFactory: PolygonFactory,
+                      bands: int = 1,
+                      workers: Optional[int] = None,
+                      rasterize: bool = True) -> List[Exception]:
+    """
+    `transformPolygon` over a whole scene. The points of every polygon are
+    computed in a single vectorized pass (see `materialize_points`); only
+    the polygons that actually moved are rasterized again, in one sweep or,
+    with more than one band, over a process pool (see
+    `PolygonFactory.update_all_cache`), or, without `rasterize`, left for
+    the next render.
+    """
+    M = transformationMatrix
+
+    for poly in polygonFactory:
+        transformPolygon(M, poly)
+
+    materialize_points(polygonFactory)
+
+    if not rasterize:
+        return []
 
-        p.x = round(x * M[0][0] + y * M[1][0] + M[2][0])
-        p.y = round(x * M[0][1] + y * M[1][1] + M[2][1])
+    return polygonFactory.update_all_cache(bands, workers)
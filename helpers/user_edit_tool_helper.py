@@ -42,10 +42,18 @@ class UserEditToolHelper(QObject):
             if self._editingPolygon is not None:
                 if self._highlightedPoint is not None and \
                    self._highlightedPointActive:
-                    self._highlightedPoint.x, self._highlightedPoint.y = \
-                        self._cursorPos.x(), \
+                    # only the rows around the dragged point are redone
+                    poly = self._editingPolygon
+                    idx = next(
+                        i for i, p in enumerate(poly.points)
+                        if p is self._highlightedPoint
+                    )
+                    poly.move_point(
+                        idx,
+                        self._cursorPos.x(),
                         self.rasterSurface.height() - self._cursorPos.y()
-                    self._editingPolygon.update_cache()
+                    )
+                    poly.update_cache()
                 self.rasterSurface.repaint()
         elif self._editingPolygon is not None:
             if et == QEvent.MouseButtonPress:
@@ -120,8 +128,10 @@ class UserEditToolHelper(QObject):
             )
 
             self._editingPolygon.points.insert(idx + 1, newPoint)
+            self._editingPolygon.mark_dirty()
 
-            self._highlightedPoint = newPoint
+            # the inserted point is a view into the polygon, not `newPoint`
+            self._highlightedPoint = self._editingPolygon.points[idx + 1]
             self.rasterSurface.repaint()
             return True
         else:
@@ -132,6 +142,7 @@ class UserEditToolHelper(QObject):
         if self._highlightedPoint is not None and \
            self._editingPolygon.length > 3:
             self._editingPolygon.points.remove(self._highlightedPoint)
+            self._editingPolygon.mark_dirty()
             self._editingPolygon.update_cache()
             self._highlightedPoint = None
             self._highlightedPointActive = False
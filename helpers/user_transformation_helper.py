@@ -10,7 +10,8 @@ from widgets.raster_surface import RasterSurface
 from widgets.polygon_transformer import PolygonTransformer
 
 from helpers.polygon_transformation_helper import \
-    Matrix33, IDENTITY_MATRIX, matmul33, transformPolygon, getTranslationMatrix
+    Matrix33, IDENTITY_MATRIX, matmul33, transformPolygon, \
+    transformPolygons, getTranslationMatrix
 
 
 class UserTransformationHelper(QObject):
@@ -159,8 +160,8 @@ class UserTransformationHelper(QObject):
                 getTranslationMatrix(self.originPoint.x, self.originPoint.y)
             )
 
+            # rasterized when next rendered
             transformPolygon(mat, self._targetShape)
-            self._targetShape.update_cache()
 
         self.userFinishedTransformPolygon.emit(self._targetShape)
 
@@ -187,9 +188,9 @@ class UserTransformationHelper(QObject):
                 getTranslationMatrix(self.originPoint.x, self.originPoint.y)
             )
 
-            for poly in self.rasterSurface.polygonFactory:
-                transformPolygon(mat, poly)
-                poly.update_cache()
+            transformPolygons(
+                mat, self.rasterSurface.polygonFactory, rasterize=False
+            )
 
         self.userFinishedTransformAllPolygon.emit()
 
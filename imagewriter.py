@@ -0,0 +1,145 @@
+from typing import BinaryIO, Optional
+import struct
+import zlib
+
+
+class ImageWriter:
+    """
+    ImageWriter encodes an 8-bit RGB or RGBA image row by row, so an image
+    never needs to be held in memory as a whole. Rows are fed top to bottom
+    through `write_rows` as raw interleaved bytes.
+    """
+
+    def __init__(self,
+                 fp: BinaryIO,
+                 width: int,
+                 height: int,
+                 alpha: bool = False):
+        if width <= 0 or height <= 0:
+            raise ValueError(
+                "invalid image size: {}x{}".format(width, height)
+            )
+
+        self.fp = fp
+        self.width = width
+        self.height = height
+        self.channels = 4 if alpha else 3
+        self.rowsWritten = 0
+
+    @property
+    def stride(self) -> int:
+        return self.width * self.channels
+
+    def write_rows(self, data) -> None:
+        """
+        Appends whole rows given as a bytes-like object of `stride` bytes
+        per row.
+        """
+        view = memoryview(data).cast("B")
+        count, rest = divmod(len(view), self.stride)
+
+        if rest:
+            raise ValueError("partial row of {} bytes".format(rest))
+        elif self.rowsWritten + count > self.height:
+            raise ValueError("too many rows for the image")
+
+        self._write(view, count)
+        self.rowsWritten += count
+
+    def close(self) -> None:
+        if self.rowsWritten != self.height:
+            raise ValueError(
+                "image is incomplete: {} of {} rows".format(
+                    self.rowsWritten, self.height
+                )
+            )
+
+        self._finish()
+
+    def _write(self, view: memoryview, count: int) -> None:
+        raise NotImplementedError
+
+    def _finish(self) -> None:
+        pass
+
+
+class PpmWriter(ImageWriter):
+    """
+    PpmWriter writes a binary (P6) PPM. PPM has no alpha channel, so only
+    RGB rows are accepted.
+    """
+
+    def __init__(self, fp: BinaryIO, width: int, height: int,
+                 alpha: bool = False):
+        if alpha:
+            raise ValueError("PPM does not support an alpha channel")
+
+        super().__init__(fp, width, height)
+        fp.write(b"P6\n%d %d\n255\n" % (width, height))
+
+    def _write(self, view: memoryview, count: int) -> None:
+        self.fp.write(view)
+
+
+class PngWriter(ImageWriter):
+    """
+    PngWriter writes a non-interlaced PNG, compressing rows as they come and
+    emitting an IDAT chunk whenever `chunkSize` compressed bytes are ready.
+    """
+
+    chunkSize = 1 << 16
+
+    def __init__(self, fp: BinaryIO, width: int, height: int,
+                 alpha: bool = False, level: int = 6):
+        super().__init__(fp, width, height, alpha)
+
+        self._zip = zlib.compressobj(level)
+        self._pending = bytearray()
+
+        fp.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(
+            ">IIBBBBB", width, height, 8, 6 if alpha else 2, 0, 0, 0
+        ))
+
+    def _chunk(self, kind: bytes, data: bytes) -> None:
+        self.fp.write(struct.pack(">I", len(data)))
+        self.fp.write(kind)
+        self.fp.write(data)
+        self.fp.write(
+            struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)))
+        )
+
+    def _write(self, view: memoryview, count: int) -> None:
+        stride = self.stride
+
+        for i in range(count):
+            # -- filter type 0 (None) in front of every row
+            self._pending += self._zip.compress(b"\x00")
+            self._pending += self._zip.compress(
+                view[i * stride:(i + 1) * stride]
+            )
+
+        while len(self._pending) >= self.chunkSize:
+            self._chunk(b"IDAT", bytes(self._pending[:self.chunkSize]))
+            del self._pending[:self.chunkSize]
+
+    def _finish(self) -> None:
+        self._pending += self._zip.flush()
+        if self._pending:
+            self._chunk(b"IDAT", bytes(self._pending))
+
+        self._chunk(b"IEND", b"")
+
+
+def get_writer_class(fn: str) -> Optional[type]:
+    """
+    Picks the writer for the extension of `fn`, or None if it is unknown.
+    """
+    ext = fn.rsplit(".", 1)[-1].lower()
+
+    if ext == "png":
+        return PngWriter
+    elif ext in ("ppm", "pnm"):
+        return PpmWriter
+
+    return None
@@ -6,6 +6,7 @@ from PyQt5.QtCore import pyqtSlot, Qt, QCoreApplication
 
 from rasterizer.polygon_helper import PolygonHelper
 from rasterizer.polygon_factory import PolygonFactory
+from rasterizer.disk_cache import RasterDiskCache, default_cache_dir
 
 from widgets.polygon_list import PolygonList
 from widgets.raster_surface import RasterSurface
@@ -25,11 +26,23 @@ class MainWindow(QMainWindow):
     def __init__(self, parent: QWidget = None):
         super().__init__(parent)
         self.polygonFactory = PolygonFactory()
+        cacheError = None
+        try:
+            self.polygonFactory.rasterCache = \
+                RasterDiskCache(default_cache_dir())
+        except OSError as ex:
+            cacheError = ex
+
         self.polygonDataHelper = PolygonDataHelper(self, self.polygonFactory)
 
         self.initUI()
         self._polygonList.polygonsChange()
 
+        if cacheError is not None:
+            self.statusBar().showMessage(
+                "Raster cache disabled: {}".format(cacheError)
+            )
+
         self._polygonId = 0
 
     def initUI(self) -> None:
@@ -225,9 +238,10 @@ class MainWindow(QMainWindow):
 
             self._polygonId += 1
 
-            polygon.update_cache()
+            # inserted first, so it is clipped like the rest of the factory
             # self.polygonFactory.add_polygon(polygon)
             self.polygonDataHelper.insertPolygon(0, polygon)
+            polygon.update_cache()
             self._polygonList.polygonsChange()
 
         self._userDrawToolPanel.show()
@@ -283,7 +297,8 @@ class MainWindow(QMainWindow):
         hdl = FileIO(self.polygonFactory)
         _, errs = hdl.readFile(fn)
 
-        errs += self.polygonDataHelper.updateAllPolygonCache()
+        # stored for the next time the file is opened
+        errs += self.polygonDataHelper.updateAllPolygonCache(storeCache=True)
 
         self.polygonDataHelper.generateMapping()
 
@@ -2,6 +2,8 @@ from . point import Point
 
 
 class Line:
+    __slots__ = ("p1", "p2")
+
     def __init__(self, x1=0, y1=0, x2=0, y2=0):
         self.p1 = Point(x1, y1)
         self.p2 = Point(x2, y2)
@@ -50,8 +52,8 @@ class Line:
         return Point(self.p2.y - self.p1.y, -(self.p2.x - self.p1.x))
 
     def pseudocross(self, l):
-        v1 = self.delta
-        v2 = l.delta
+        v1 = self.delta()
+        v2 = l.delta()
 
         return v1.x * v2.y - v1.y * v2.x
 
@@ -1,12 +1,144 @@
+from array import array
+
 from . line import Line, Point
 
 
+class PointRef(Point):
+    """
+    A point of a polygon, read from and written to its coordinate array.
+    """
+    __slots__ = ("owner", "index")
+
+    def __init__(self, owner, index):
+        self.owner = owner
+        self.index = index
+
+    @property
+    def x(self):
+        return self.owner.coords[2 * self.index]
+
+    @x.setter
+    def x(self, val):
+        self.owner.coords[2 * self.index] = val
+        self.owner.mark_dirty()
+
+    @property
+    def y(self):
+        return self.owner.coords[2 * self.index + 1]
+
+    @y.setter
+    def y(self, val):
+        self.owner.coords[2 * self.index + 1] = val
+        self.owner.mark_dirty()
+
+
+class PointList:
+    """
+    List-like view of the points of a polygon. The same `PointRef` is
+    returned for a point until it is removed, so points compare by identity
+    like they did in a list.
+    """
+    __slots__ = ("owner",)
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def _refs(self):
+        owner = self.owner
+        if owner._refs is None:
+            owner._refs = [
+                PointRef(owner, i) for i in range(len(owner.coords) // 2)
+            ]
+
+        return owner._refs
+
+    def _renumber(self, start):
+        refs = self._refs()
+        for i in range(start, len(refs)):
+            refs[i].index = i
+
+    def __len__(self):
+        return len(self.owner.coords) // 2
+
+    def __getitem__(self, idx):
+        return self._refs()[idx]
+
+    def __setitem__(self, idx, p):
+        idx = range(len(self))[idx]
+        self.owner.coords[2 * idx:2 * idx + 2] = array("i", (p.x, p.y))
+        self.owner.mark_dirty()
+
+    def __delitem__(self, idx):
+        idx = range(len(self))[idx]
+        refs = self._refs()
+        del self.owner.coords[2 * idx:2 * idx + 2]
+        del refs[idx]
+        self._renumber(idx)
+        self.owner.mark_dirty()
+
+    def __iter__(self):
+        return iter(self._refs())
+
+    def __contains__(self, p):
+        return any(q == p for q in self)
+
+    def insert(self, idx, p):
+        idx = min(max(idx + len(self) if idx < 0 else idx, 0), len(self))
+        refs = self._refs()
+        self.owner.coords[2 * idx:2 * idx] = array("i", (p.x, p.y))
+        refs.insert(idx, PointRef(self.owner, idx))
+        self._renumber(idx + 1)
+        self.owner.mark_dirty()
+
+    def append(self, p):
+        self.insert(len(self), p)
+
+    def index(self, p):
+        for i, q in enumerate(self):
+            if q is p or q == p:
+                return i
+
+        raise ValueError("point is not in polygon")
+
+    def remove(self, p):
+        del self[self.index(p)]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
 class Polygon:
     def __init__(self, *args):
-        self.points = []
+        # x, y of every point, one after the other
+        self._coords = array("i")
+        self._refs = None
 
         for p in args:
-            self.points.append(Point.from_point(p))
+            self._coords.append(p.x)
+            self._coords.append(p.y)
+
+    @property
+    def coords(self):
+        return self._coords
+
+    @property
+    def points(self):
+        return PointList(self)
+
+    @points.setter
+    def points(self, points):
+        self._coords = array("i", [c for p in points for c in (p.x, p.y)])
+        self._refs = None
+
+    def mark_dirty(self):
+        """
+        Called whenever a point is written, inserted or removed through
+        `points`, for subclasses keeping anything computed from them.
+        """
+        pass
 
     @staticmethod
     def from_polygon(p):
@@ -19,90 +151,208 @@ class Polygon:
         if ln <= 0 or ln % 2 != 0:
             raise ValueError("list must be a multiple of two")
 
-        idx = 0
-        points = []
-
-        while idx < ln:
-            points.append(Point(lst[idx], lst[idx + 1]))
-            idx += 2
-
-        return Polygon(*points)
+        poly = Polygon()
+        poly._coords = array("i", lst)
+        return poly
 
     def clone_points(self):
         return list(self.points)
 
     def get_point(self, idx):
-        ln = len(self.points)
+        ln = self.length
         if idx >= ln:
             raise IndexError("list index out of range")
 
-        return Point.from_point(self.points[idx])
+        return Point(self.coords[2 * idx], self.coords[2 * idx + 1])
 
     def get_point_ref(self, idx):
-        ln = self.points.length
+        ln = self.length
         if idx >= ln:
             raise IndexError("list index out of range")
 
         return self.points[idx]
 
     def get_line(self, idx):
-        ln = self.points.length
+        ln = self.length
         if idx >= ln:
             raise IndexError("list index out of range")
 
-        return Line.from_points(self.points[idx], self.points[(idx + 1) % ln])
+        c = self.coords
+        nx = (idx + 1) % ln
+
+        return Line(c[2 * idx], c[2 * idx + 1], c[2 * nx], c[2 * nx + 1])
 
     @property
     def length(self):
-        return len(self.points)
+        return len(self.coords) // 2
 
     def points_iter(self):
         for p in self.points:
             yield p
 
+    def edges_iter(self):
+        """
+        Yields the x1, y1, x2, y2 end points of every edge straight from the
+        coordinate array, without making `Line` or `Point` objects.
+        """
+        xs = self.coords[0::2]
+        ys = self.coords[1::2]
+
+        return zip(xs, ys, xs[1:] + xs[:1], ys[1:] + ys[:1])
+
     def lines_iter(self):
-        i = 0
-        ln = len(self.points)
+        for x1, y1, x2, y2 in self.edges_iter():
+            yield Line(x1, y1, x2, y2)
+
+    def _distinct_points(self):
+        """
+        The points with repeated consecutive ones left out.
+        """
+        pts = list(zip(self.coords[0::2], self.coords[1::2]))
+        out = [p for i, p in enumerate(pts) if p != pts[i - 1]]
 
-        while i < ln:
-            n = i
-            i += 1
-            nx = i % ln
+        return out if len(out) > 0 else pts[:1]
 
-            yield Line.from_points(self.points[n], self.points[nx])
+    def signed_area2(self):
+        """
+        Twice the signed area, positive when the points go counterclockwise
+        (with `y` pointing up).
+        """
+        xs = self.coords[0::2]
+        ys = self.coords[1::2]
+
+        return sum(
+            x1 * y2 - x2 * y1
+            for x1, y1, x2, y2 in zip(xs, ys, xs[1:] + xs[:1], ys[1:] + ys[:1])
+        )
 
     def is_clockwise(self):
         ln = len(self.points)
         if ln < 3:
             raise ValueError("polygon must be comprised of at least 3 points")
 
-        l1 = self.get_line(0)
-        v1 = l1.delta
-
-        l2 = self.get_line(1)
-        v2 = l2.delta
-
-        v1.x * v2.y - v1.y * v2.x < 0
+        return self.signed_area2() < 0
 
     def is_convex(self):
+        """
+        Whether the polygon is convex: it turns the same way at every point,
+        goes around once and encloses a non-zero area. Collinear and
+        repeated points are allowed.
+        """
         ln = len(self.points)
         if ln < 3:
             raise ValueError("polygon must be comprised of at least 3 points")
 
-        first = l1 = self.get_line(0)
-        l2 = self.get_line(1)
+        pts = self._distinct_points()
+        ln = len(pts)
+        if ln < 3:
+            return False
 
-        c1 = c2 = l1.pseudocross(l2)
+        turn = 0
+        flips = 0
+        last_dy = 0
 
-        i = 2
-        while i < ln and c1 * c2 > 0:
-            l1 = l2
-            c1 = c2
-            l2 = self.get_line(i)
-            c2 = l1.pseudocross(l2)
-            i += 1
+        for i in range(ln):
+            x0, y0 = pts[i - 2]
+            x1, y1 = pts[i - 1]
+            x2, y2 = pts[i]
+            ax, ay = x1 - x0, y1 - y0
+            bx, by = x2 - x1, y2 - y1
 
-        if c1 * c2 > 0:
-            return c2 * l2.pseudocross(first) > 0
-        else:
+            c = ax * by - ay * bx
+            if c == 0:
+                if ax * bx + ay * by < 0:  # doubles back on itself
+                    return False
+            elif turn == 0:
+                turn = c
+            elif (c > 0) != (turn > 0):
+                return False
+
+            # -- a single turn around goes up once and down once
+            if by != 0:
+                if last_dy != 0 and (by > 0) != (last_dy > 0):
+                    flips += 1
+                last_dy = by
+
+        if turn == 0:  # every point on one line
             return False
+
+        # the flip back to the first edge was not counted yet
+        first_dy = next(
+            y2 - y1 for (_, y1), (_, y2) in zip(pts[-1:] + pts, pts)
+            if y2 != y1
+        )
+        if (first_dy > 0) != (last_dy > 0):
+            flips += 1
+
+        return flips == 2
+
+    def is_simple(self):
+        """
+        Whether no two edges meet anywhere but at the point they share, with
+        the edges swept by their lowest `x` so only those overlapping along
+        `x` are tested against each other.
+        """
+        ln = len(self.points)
+        if ln < 3:
+            raise ValueError("polygon must be comprised of at least 3 points")
+
+        pts = self._distinct_points()
+        ln = len(pts)
+        if ln < 3:
+            return False
+
+        edges = [(pts[i], pts[(i + 1) % ln]) for i in range(ln)]
+        x_lo = [min(p[0], q[0]) for p, q in edges]
+        x_hi = [max(p[0], q[0]) for p, q in edges]
+        active = []
+
+        for i in sorted(range(ln), key=x_lo.__getitem__):
+            active = [j for j in active if x_hi[j] >= x_lo[i]]
+
+            for j in active:
+                if _edges_cross(edges, ln, i, j):
+                    return False
+
+            active.append(i)
+
+        return True
+
+
+def _orient(a, b, c):
+    d = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (d > 0) - (d < 0)
+
+
+def _on_segment(a, b, p):
+    return min(a[0], b[0]) <= p[0] <= max(a[0], b[0]) and \
+        min(a[1], b[1]) <= p[1] <= max(a[1], b[1])
+
+
+def _edges_cross(edges, ln, i, j):
+    """
+    Whether edges `i` and `j` of a closed outline of `ln` edges touch
+    anywhere but at the point neighbouring edges share.
+    """
+    a, b = edges[i]
+    c, d = edges[j]
+
+    # neighbours only go wrong by folding back along each other
+    if (i + 1) % ln == j or (j + 1) % ln == i:
+        p, q, r = (a, b, d) if (i + 1) % ln == j else (c, d, b)
+
+        return _orient(p, q, r) == 0 and \
+            (q[0] - p[0]) * (r[0] - q[0]) + (q[1] - p[1]) * (r[1] - q[1]) < 0
+
+    o1 = _orient(a, b, c)
+    o2 = _orient(a, b, d)
+    o3 = _orient(c, d, a)
+    o4 = _orient(c, d, b)
+
+    if o1 * o2 < 0 and o3 * o4 < 0:
+        return True
+
+    return (o1 == 0 and _on_segment(a, b, c)) or \
+        (o2 == 0 and _on_segment(a, b, d)) or \
+        (o3 == 0 and _on_segment(c, d, a)) or \
+        (o4 == 0 and _on_segment(c, d, b))
@@ -0,0 +1,210 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from . span_cache import SpanCache
+
+
+# Bump whenever the spans produced for the same polygon change, so entries
+# written by an older rasterizer are never read back.
+RASTER_VERSION = 2
+
+# magic, then y0, offset count and x count of the fills and the outline
+_HEADER = struct.Struct("=4s6i")
+_MAGIC = b"SPC1"
+_SUFFIX = ".spans"
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or \
+        os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "polygon-rasterizer")
+
+
+class RasterDiskCache:
+    """
+    `RasterDiskCache` keeps the span caches of polygons on disk, one file
+    per polygon named after a hash of its points, outline thickness and
+    `RASTER_VERSION`. The spans are kept unclipped, so an entry serves
+    every clip window (see `SpanCache.clipped`). Entries are memory-mapped
+    when read, so the `SpanCache` buffers point straight into the page
+    cache. Once the files take more than `maxBytes`, the least recently
+    used ones are removed.
+    """
+
+    def __init__(self, directory: str, maxBytes: int = 256 << 20):
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.maxBytes = maxBytes
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        # -- file name to size, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        found = []
+        for name in os.listdir(directory):
+            if name.endswith(_SUFFIX):
+                try:
+                    st = os.stat(os.path.join(directory, name))
+                except OSError:
+                    continue
+                found.append((st.st_mtime, name, st.st_size))
+
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+
+        self.evict()
+
+    @staticmethod
+    def key(poly) -> str:
+        h = hashlib.blake2b(digest_size=20)
+        h.update(struct.pack(
+            "=i4sq", RASTER_VERSION, sys.byteorder.encode()[:4],
+            poly.outlineThickness
+        ))
+        h.update(poly.coords)
+        return h.hexdigest()
+
+    @property
+    def size(self) -> int:
+        return sum(self._entries.values())
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def load(self, poly) -> Optional[Tuple[SpanCache, SpanCache]]:
+        """
+        Returns the unclipped cached fill and outline spans of `poly`, or
+        None.
+        """
+        name = self.key(poly) + _SUFFIX
+
+        try:
+            with open(self._path(name), "rb") as fp:
+                mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.misses += 1
+            self._entries.pop(name, None)
+            return None
+
+        try:
+            magic, *counts = _HEADER.unpack_from(mm)
+            if magic != _MAGIC:
+                raise ValueError("invalid raster cache entry")
+
+            view = memoryview(mm)
+            pos = _HEADER.size
+            caches = []
+
+            for i in (0, 3):
+                cache = SpanCache()
+                cache.y0 = counts[i]
+
+                end = pos + counts[i + 1] * 4
+                cache.offsets = view[pos:end].cast("i")
+                pos, end = end, end + counts[i + 2] * 4
+                cache.xs = view[pos:end].cast("i")
+                pos = end
+
+                caches.append(cache)
+
+            if pos != len(mm):
+                raise ValueError("invalid raster cache entry")
+        except (ValueError, TypeError, struct.error):
+            self.misses += 1
+            self.discard(name)
+            return None
+
+        self.hits += 1
+        self._entries[name] = len(mm)
+        self._entries.move_to_end(name)
+        try:
+            os.utime(self._path(name))
+        except OSError:
+            pass
+
+        return caches[0], caches[1]
+
+    def store(self, poly, lines: SpanCache, outline: SpanCache) -> None:
+        """
+        Writes the unclipped fill and outline spans of `poly`.
+        """
+        name = self.key(poly) + _SUFFIX
+        parts = [
+            _HEADER.pack(
+                _MAGIC,
+                lines.y0, len(lines.offsets), len(lines.xs),
+                outline.y0, len(outline.offsets), len(outline.xs)
+            ),
+            lines.offsets.tobytes(),
+            lines.xs.tobytes(),
+            outline.offsets.tobytes(),
+            outline.xs.tobytes(),
+        ]
+        size = sum(len(p) for p in parts)
+
+        # -- written aside and renamed, so readers never see half a file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                for p in parts:
+                    fp.write(p)
+            os.replace(tmp, self._path(name))
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+
+        self.writes += 1
+        self._entries[name] = size
+        self._entries.move_to_end(name)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until `maxBytes` holds.
+        """
+        total = self.size
+        while total > self.maxBytes and len(self._entries) > 0:
+            name, size = next(iter(self._entries.items()))
+            self.discard(name)
+            self.evictions += 1
+            total -= size
+
+    def discard(self, name: str) -> None:
+        self._entries.pop(name, None)
+        try:
+            os.remove(self._path(name))
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        for name in list(self._entries):
+            self.discard(name)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
+
+    def __repr__(self) -> str:
+        s = self.stats()
+        return "[RasterDiskCache {} hits, {} misses, {} entries, " \
+            "{} bytes]".format(s["hits"], s["misses"], s["entries"],
+                               s["bytes"])
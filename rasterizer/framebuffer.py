@@ -0,0 +1,130 @@
+from typing import Iterable, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, see `has_numpy`
+    np = None
+
+from . span_cache import SpanCache
+
+
+def has_numpy() -> bool:
+    return np is not None
+
+
+class Framebuffer:
+    """
+    `Framebuffer` is an RGBA image held in a (height, width, 4) uint8 NumPy
+    array with premultiplied alpha, onto which cached spans are composited
+    with the "over" operator. Rows follow `RasterSurface`: a span on `y`
+    lands on row `height - y`.
+    """
+
+    def __init__(self, width: int, height: int):
+        if np is None:
+            raise RuntimeError("the framebuffer requires NumPy")
+
+        self.pixels = np.zeros((max(0, height), max(0, width), 4), np.uint8)
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    def resize(self, width: int, height: int) -> None:
+        if (width, height) != (self.width, self.height):
+            self.pixels = np.zeros(
+                (max(0, height), max(0, width), 4), np.uint8
+            )
+
+    def clear(self, color: Tuple[int, int, int, int] = (0, 0, 0, 0)) \
+            -> None:
+        self.pixels[:, :] = self.premultiply(color)
+
+    @staticmethod
+    def premultiply(color: Tuple[int, int, int, int]) \
+            -> Tuple[int, int, int, int]:
+        r, g, b, a = color
+        return (
+            (r * a + 127) // 255,
+            (g * a + 127) // 255,
+            (b * a + 127) // 255,
+            a
+        )
+
+    @staticmethod
+    def unpremultiply(pixels: "np.ndarray") -> "np.ndarray":
+        """
+        Returns a copy of the premultiplied RGBA `pixels` with straight
+        alpha, as image files expect it.
+        """
+        out = pixels.copy()
+        a = pixels[..., 3:].astype(np.uint32)
+        rgb = pixels[..., :3].astype(np.uint32)
+
+        np.floor_divide(
+            rgb * 255 + a // 2, np.maximum(a, 1), out=rgb
+        )
+        out[..., :3] = np.minimum(rgb, 255)
+        out[..., :3][pixels[..., 3] == 0] = 0
+        return out
+
+    def composite_spans(
+        self,
+        spans: Union[SpanCache, Iterable[Tuple[int, int, int]]],
+        color: Tuple[int, int, int, int],
+        top: Optional[int] = None
+    ) -> None:
+        """
+        Blends `color` over every pixel covered by `spans`, a `SpanCache` or
+        (y, x1, x2) tuples, with `x2` excluded, which must not overlap each
+        other. A span lands on row `top - y`, where `top` defaults to the
+        height, so a framebuffer can also hold a band out of a larger
+        canvas.
+        """
+        a = color[3]
+        if a == 0:
+            return
+
+        if isinstance(spans, SpanCache):
+            ys, x1, x2 = spans.to_numpy()
+        else:
+            s = np.array(spans, dtype=np.int64).reshape(-1, 3)
+            ys, x1, x2 = s[:, 0], s[:, 1], s[:, 2]
+
+        if top is None:
+            top = self.height
+
+        rows = top - ys.astype(np.int64)
+        x1 = np.maximum(x1, 0)
+        x2 = np.minimum(x2, self.width)
+
+        keep = (rows >= 0) & (rows < self.height) & (x1 < x2)
+        if not keep.any():
+            return
+
+        rows = rows[keep]
+        x1 = x1[keep]
+        x2 = x2[keep]
+
+        # -- index of every covered pixel, one uint32 per RGBA pixel
+        ln = x2 - x1
+        total = int(ln.sum())
+        idx = np.arange(total, dtype=np.int64) + \
+            np.repeat(rows * self.width + x1 - (np.cumsum(ln) - ln), ln)
+
+        flat = self.pixels.reshape(-1).view(np.uint32)
+        src = np.array(self.premultiply(color), dtype=np.uint8)
+
+        if a == 255:
+            flat[idx] = src.view(np.uint32)[0]
+        else:
+            dst = flat[idx].view(np.uint8).reshape(-1, 4).astype(np.uint16)
+            dst *= 255 - a
+            dst += 127
+            dst //= 255
+            dst += src
+            flat[idx] = dst.astype(np.uint8).reshape(-1).view(np.uint32)
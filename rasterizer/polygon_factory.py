@@ -1,13 +1,40 @@
-from typing import List, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
 
 from primitives import Point
 from . polygon_helper import PolygonHelper
+from . span_cache import SpanCache
+from . disk_cache import RasterDiskCache
+from . scanline.edge_table import EdgeTable
+from . scanline.scene import SceneEdgeTable, rasterize_scene, \
+    rasterize_scene_arrays
+from . scanline.vectorized import has_numpy
+from . scanline.banded import rasterize_scene_banded, default_workers
 
 
 class PolygonFactory(list):
     def __init__(self):
         super().__init__()
 
+        # (x0, y0, x1, y1) window the caches are clipped to, if any
+        self.clipRect: Optional[Tuple[int, int, int, int]] = None
+
+        # spans of polygons rasterized before, see `update_all_cache`
+        self.rasterCache: Optional[RasterDiskCache] = None
+
+        # process pool of the banded rasterizer, kept between calls, see
+        # `get_executor`
+        self._executor: Optional[Executor] = None
+        self._executorWorkers: int = 0
+
+    def append(self, poly: PolygonHelper) -> None:
+        poly.parent = self
+        super().append(poly)
+
+    def insert(self, idx: int, poly: PolygonHelper) -> None:
+        poly.parent = self
+        super().insert(idx, poly)
+
     def create(self, points: List[Point], name: str = "") \
             -> PolygonHelper:
         poly = PolygonHelper(*points, name=name, parent=self)
@@ -20,16 +47,174 @@ class PolygonFactory(list):
         else:
             return self[idx]
 
-    def update_all_cache(self) -> List[Exception]:
+    def get_executor(self, workers: Optional[int] = None) -> Executor:
+        """
+        Returns the process pool of `workers` processes the bands are
+        rasterized in, started on first use and kept until `shutdown`, so
+        every call does not pay for starting the processes again.
+        """
+        if workers is None:
+            workers = default_workers()
+
+        if self._executor is not None and self._executorWorkers != workers:
+            self.shutdown()
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            self._executorWorkers = workers
+
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def update_all_cache(self,
+                         bands: int = 1,
+                         workers: Optional[int] = None,
+                         staleOnly: bool = False,
+                         executor: Optional[Executor] = None,
+                         storeCache: bool = False) -> List[Exception]:
+        """
+        Rasterizes every polygon in a single sweep over the scene, or, with
+        more than one band, in `bands` bands over `executor`, by default the
+        pool of `workers` processes of `get_executor` (see
+        `rasterize_scene_banded`). Polygons whose cache is current and
+        clipped to `clipRect` are left alone, as are, with `staleOnly`,
+        polygons never rasterized at all.
+
+        Polygons found in `rasterCache` are loaded from it instead. With
+        `storeCache`, as when a file is opened, the others are rasterized
+        unclipped and stored in it, then clipped to `clipRect`.
+
+        Convex polygons are walked one by one instead of joining the sweep
+        (see `PolygonHelper.get_convex_spans`), unless it is the vectorized
+        one, which outpaces the walker over a whole scene.
+        """
         errors = []
+        polys: List[PolygonHelper] = []
+        cache = self.rasterCache
+        walk = bands > 1 or not has_numpy()
+
+        # stored spans are unclipped, so they serve any clip window
+        store = storeCache and cache is not None
+        clip = None if store else self.clipRect
 
         for p in self:
+            if p.has_cache and p.cachedClip == self.clipRect:
+                continue
+
+            if staleOnly and not hasattr(p, "cachedVersion"):
+                continue
+
+            if cache is not None and len(p.points) >= 3:
+                found = cache.load(p)
+                if found is not None:
+                    p.cachedEdgeTable = None  # built on demand
+                    p.cachedVersion = p.geometryVersion
+                    p.cachedResult = True
+                    p.cachedOutlineThickness = p.outlineThickness
+                    self._clip_cache(p, *found)
+                    continue
+
+            convex = walk and p.topology.convex
             try:
-                p.update_cache()
+                table = None if convex else EdgeTable.from_polygon(p)
             except Exception as ex:
                 errors.append(ex)
+                continue
+
+            p.cachedEdgeTable = table
+            p.cachedClip = clip
+            p.cachedVersion = p.geometryVersion
+            p.cachedResult = True
+            p.update_outline_cache()
+
+            if not convex:
+                polys.append(p)
+                continue
+
+            p.cachedLines = p.get_convex_spans(clip)
+            if store:
+                cache.store(p, p.cachedLines, p.cachedOutline)
+                self._clip_cache(p, p.cachedLines, p.cachedOutline)
+
+        scene = SceneEdgeTable([p.cachedEdgeTable for p in polys])
+
+        try:
+            if bands > 1:
+                if executor is None:
+                    executor = self.get_executor(workers)
+
+                lines = [
+                    SpanCache.from_spans(spans)
+                    for spans in rasterize_scene_banded(
+                        scene, bands, workers, clip, executor
+                    )
+                ]
+            elif has_numpy():
+                spans, bounds = rasterize_scene_arrays(scene, clip)
+                lines = [
+                    SpanCache.from_arrays(
+                        spans[a:b, 0], spans[a:b, 1], spans[a:b, 2]
+                    )
+                    for a, b in zip(bounds[:-1], bounds[1:])
+                ]
+            else:
+                lines = [
+                    SpanCache.from_spans(spans)
+                    for spans in rasterize_scene(scene, clip)
+                ]
+        except ValueError:
+            # a polygon is crossed an odd number of times, so find out which
+            # one by rasterizing them one by one
+            for p in polys:
+                p.update_cache(force=True)
+        else:
+            for p, spans in zip(polys, lines):
+                p.cachedLines = spans
+                if store:
+                    cache.store(p, p.cachedLines, p.cachedOutline)
+                    self._clip_cache(p, p.cachedLines, p.cachedOutline)
 
         return errors
 
+    def _clip_cache(self,
+                    poly: PolygonHelper,
+                    lines: SpanCache,
+                    outline: SpanCache) -> None:
+        """
+        Caches the unclipped `lines` and `outline` in `poly`, clipped to
+        `clipRect`.
+        """
+        clip = self.clipRect
+        if clip is not None:
+            lines = lines.clipped(clip)
+            outline = outline.clipped(clip, keep_empty=False)
+
+        poly.cachedClip = clip
+        poly.cachedLines = lines
+        poly.cachedOutline = outline
+
+    def update_clip(self,
+                    rect: Optional[Tuple[int, int, int, int]],
+                    bands: int = 1,
+                    workers: Optional[int] = None) -> List[Exception]:
+        """
+        Sets `clipRect` and re-rasterizes, in one `update_all_cache` sweep,
+        the polygons already rasterized whose spans the new window cuts
+        differently: those crossing the edge of the old or the new one (see
+        `PolygonHelper.clip_unchanged`). The others keep their cache.
+        """
+        self.clipRect = rect
+
+        for p in self:
+            if hasattr(p, "cachedVersion") and p.cachedClip != rect and \
+                    p.clip_unchanged(rect):
+                p.cachedClip = rect
+
+        return self.update_all_cache(bands, workers, staleOnly=True)
+
     def removeByIndex(self, idx: int) -> None:
         del self.polygons[idx]
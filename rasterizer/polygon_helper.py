@@ -1,7 +1,38 @@
-from typing import List, Tuple, Optional
+from concurrent.futures import Executor
+from typing import Iterable, List, Tuple, Optional
+from array import array
+import math
+import sys
 
-from . scanline.scanline import get_scanline_bucket, get_raster_lines
-from primitives import Point, Polygon
+from . scanline.scanline import get_table_spans, get_clipped_spans
+from . scanline.edge_table import EdgeTable
+from . scanline.banded import get_banded_spans
+from . scanline.stroke import get_outline_spans
+from . scanline.convex import ConvexTable, get_convex_rows, \
+    get_convex_clipped_rows
+from . span_cache import SpanCache
+from . topology import Topology
+from . scanline.vectorized import np
+from primitives import Point, PointList, Polygon
+
+
+Affine = Tuple[
+    Tuple[float, float, float],
+    Tuple[float, float, float],
+    Tuple[float, float, float]
+]
+
+_IDENTITY: Affine = ((1, 0, 0), (0, 1, 0), (0, 0, 1))
+
+
+def _compose(m1: Affine, m2: Affine) -> Affine:
+    """
+    `m1` then `m2`, for row vectors.
+    """
+    return tuple(
+        tuple(sum(m1[i][k] * m2[k][j] for k in range(3)) for j in range(3))
+        for i in range(3)
+    )
 
 
 class PolygonHelper(Polygon):
@@ -16,6 +47,20 @@ class PolygonHelper(Polygon):
                  outlineColor: Optional[Tuple[int, int, int, int]] = None,
                  outlineThickness: int = 0,
                  parent=None):
+        # bumped by every change of the points, see `mark_dirty`
+        self.geometryVersion: int = 0
+
+        # float x, y the points are computed from after `transform_by`:
+        # round(master * transform) + offset, None once edited directly
+        self._masterCoords: Optional[array] = None
+        self._transform: Affine = _IDENTITY
+        self._offset: Tuple[int, int] = (0, 0)
+        self._pointsStale: bool = False
+
+        # classified once per geometry version, see `topology`
+        self._topology: Optional[Topology] = None
+        self._topologyVersion: int = -1
+
         super().__init__(*args)
         self.parent = parent
         self.name = name
@@ -39,53 +84,243 @@ class PolygonHelper(Polygon):
     def from_list(points: List[Tuple[int, int]]):
         return PolygonHelper(*[Point(x, y) for x, y in points])
 
+    @property
+    def points(self) -> PointList:
+        if self._pointsStale:
+            self._materialize()
+
+        return PointList(self)
+
+    @property
+    def coords(self) -> array:
+        if self._pointsStale:
+            self._materialize()
+
+        return self._coords
+
+    @points.setter
+    def points(self, points: List[Point]) -> None:
+        Polygon.points.fset(self, points)
+        self._pointsStale = False
+        self.mark_dirty()
+
+    def mark_dirty(self) -> None:
+        """
+        Marks the cache as out of date. The point methods below and writes
+        through `points` call it; code changing `coords` in place must call
+        it too. The points become the geometry later transforms start from.
+        """
+        if self._pointsStale:
+            self._materialize()
+
+        self._masterCoords = None
+        self._transform = _IDENTITY
+        self._offset = (0, 0)
+        self.geometryVersion += 1
+
+    def transform_by(self, M: Affine) -> None:
+        """
+        Composes the row-vector affine `M` onto the polygon without touching
+        the points: they are computed from the float geometry they had
+        before the first transform the next time they are read, so chained
+        transforms are rounded once and never drift.
+        """
+        if self._masterCoords is None:
+            self._masterCoords = array("d", self._coords)
+
+        T = self._transform
+        tx, ty = self._offset
+        if tx != 0 or ty != 0:
+            T = _compose(T, ((1, 0, 0), (0, 1, 0), (tx, ty, 1)))
+
+        self._transform = _compose(T, M)
+        self._offset = (0, 0)
+        self._pointsStale = True
+
+    def _materialize(self) -> None:
+        """
+        Recomputes the integer points from the float geometry, marking the
+        cache out of date only when one of them moved.
+        """
+        self._pointsStale = False
+        T = self._transform
+        tx, ty = self._offset
+        m = self._masterCoords
+        coords = array("i")
+
+        for x, y in zip(m[0::2], m[1::2]):
+            coords.append(
+                math.floor(x * T[0][0] + y * T[1][0] + T[2][0] + 0.5) + tx
+            )
+            coords.append(
+                math.floor(x * T[0][1] + y * T[1][1] + T[2][1] + 0.5) + ty
+            )
+
+        if coords != self._coords:
+            self._coords[:] = coords
+            self.geometryVersion += 1
+
+    @property
+    def topology(self) -> Topology:
+        """
+        The `Topology` of the current points, classified again only after
+        the geometry changed.
+        """
+        if self._pointsStale:
+            self._materialize()
+
+        if self._topologyVersion != self.geometryVersion:
+            self._topology = Topology(self)
+            self._topologyVersion = self.geometryVersion
+
+        return self._topology
+
     # --
     @property
     def has_cache(self) -> bool:
-        return all(
-            [
-                hasattr(self, i)
-                for i in ("cachedBucketIds", "cachedBucketVals", "cachedLines")
-            ]
-        )
+        """
+        Whether the cached spans were made from the current points.
+        """
+        if self._pointsStale:
+            self._materialize()
+
+        return getattr(self, "cachedVersion", None) == self.geometryVersion
+
+    @property
+    def has_stale_cache(self) -> bool:
+        return hasattr(self, "cachedVersion") and not self.has_cache
+
+    @property
+    def clipRect(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        The clip window of the factory the polygon belongs to, if any.
+        """
+        return getattr(self.parent, "clipRect", None)
 
-    def update_cache(self) -> bool:
+    def update_cache(self,
+                     bands: int = 1,
+                     workers: Optional[int] = None,
+                     force: bool = False,
+                     executor: Optional[Executor] = None) -> bool:
         """
-        Generates a list of tuple with three integers: y, x1, x2
+        Generates the y, x1, x2 spans into a `SpanCache`
+
+        Nothing is done, unless `force` is set, when the cache is already
+        made from the current points and clip window.
+
+        Only the spans inside `clipRect` are kept, when set.
+        With more than one band, the rows are split into `bands` bands
+        rasterized in `executor`, by default the process pool of the
+        parent factory (see `get_banded_spans`).
+        Convex polygons are walked by a `ConvexTable` in one go instead.
+        The stroked outline is cached as well, see `update_outline_cache`.
         """
-        self.cachedBucketIds, self.cachedBucketVals = get_scanline_bucket(self)
-        self.cachedLines = []
+        clip = self.clipRect
+        if not force and self.has_cache and self.cachedClip == clip:
+            return self.cachedResult
+
+        convex = self.topology.convex
+        self.cachedEdgeTable = None if convex \
+            else EdgeTable.from_polygon(self)
+        self.cachedClip = clip
+        self.cachedVersion = self.geometryVersion
+        self.update_outline_cache()
 
-        prev = None
-        for x, y in get_raster_lines(
-            self.cachedBucketIds,
-            self.cachedBucketVals
-        ):
-            if prev is None:
-                prev = (y, x)
+        try:
+            if convex:
+                self.cachedLines = self.get_convex_spans(clip)
             else:
-                y1 = prev[0]
-                if y1 != y:
-                    return False
+                if bands > 1:
+                    if executor is None and self.parent is not None:
+                        executor = self.parent.get_executor(workers)
 
-                self.cachedLines.append((y, prev[1], x))
-                prev = None
+                    spans = get_banded_spans(
+                        self.cachedEdgeTable,
+                        bands,
+                        workers,
+                        self.cachedClip,
+                        executor
+                    )
+                elif self.cachedClip is None:
+                    spans = get_table_spans(self.cachedEdgeTable)
+                else:
+                    spans = get_clipped_spans(
+                        self.cachedEdgeTable,
+                        self.cachedClip
+                    )
 
-        return prev is None
+                self.cachedLines = SpanCache.from_spans(spans)
+        except ValueError:
+            self.cachedLines = SpanCache()
+            self.cachedResult = False
+        else:
+            self.cachedResult = True
+
+        return self.cachedResult
+
+    def get_convex_spans(
+        self,
+        clip: Optional[Tuple[int, int, int, int]] = None
+    ) -> SpanCache:
+        """
+        Returns the spans of a convex polygon (see `topology`) inside the
+        window `clip`, walked by a `ConvexTable`.
+        """
+        table = ConvexTable.from_polygon(self)
+
+        if clip is None:
+            return SpanCache.from_rows(*get_convex_rows(table))
+        else:
+            return SpanCache.from_rows(*get_convex_clipped_rows(table, clip))
+
+    def get_edge_table(self) -> EdgeTable:
+        """
+        Returns the cached edge table, building it first when the spans
+        came from a `RasterDiskCache` without one.
+        """
+        if getattr(self, "cachedEdgeTable", None) is None:
+            self.cachedEdgeTable = EdgeTable.from_polygon(self)
+
+        return self.cachedEdgeTable
+
+    def update_outline_cache(self) -> None:
+        """
+        Strokes the outline with `outlineThickness` into the spans of
+        `cachedOutline`, clipped like `cachedLines`.
+        """
+        self.cachedOutline = SpanCache.from_spans(get_outline_spans(
+            self,
+            self.outlineThickness,
+            getattr(self, "cachedClip", None)
+        ))
+        self.cachedOutlineThickness = self.outlineThickness
+
+    def get_cached_outline(self) -> SpanCache:
+        """
+        Returns the cached outline spans, stroking them again first when
+        `outlineThickness` changed since.
+        """
+        if getattr(self, "cachedOutlineThickness", None) != \
+                self.outlineThickness:
+            self.update_outline_cache()
+
+        return self.cachedOutline
 
     # TODO: remove?
-    def get_cached_raster(self) -> List[Tuple[int, int, int]]:
+    def get_cached_raster(self) -> SpanCache:
         """
-        Returns a list of tuple with three integers: y, x1, x2
+        Returns the cached y, x1, x2 spans
         """
         return self.cachedLines
     # --
 
     def add_point(self, x: int, y: int) -> None:
         self.points.append(Point(x, y))
+        self.mark_dirty()
 
     def insert_point(self, idx: int, x: int, y: int) -> None:
         self.points.insert(idx, Point(x, y))
+        self.mark_dirty()
 
     def update_point(self, idx: int, x: int, y: int) -> bool:
         if idx >= len(self.points):
@@ -94,8 +329,169 @@ class PolygonHelper(Polygon):
             p = self.points[idx]
             p.x = x
             p.y = y
+            self.mark_dirty()
             return True
 
+    def move_point(self, idx: int, x: int, y: int) -> bool:
+        """
+        `update_point` for a dragged vertex. When the cache was current,
+        only the rows covered by the two edges next to the vertex, before
+        or after the move, are rasterized again and spliced into it.
+        """
+        ln = len(self.points)
+        if idx >= ln:
+            return False
+
+        current = ln >= 3 and self.has_cache and self.cachedResult and \
+            self.cachedClip == self.clipRect
+
+        c = self.coords
+        ys = (c[2 * idx - 1], c[2 * idx + 1], y, c[(2 * idx + 3) % (2 * ln)])
+
+        c[2 * idx] = x
+        c[2 * idx + 1] = y
+        self.mark_dirty()
+
+        if current:
+            self.update_cache_rows(min(ys), max(ys) + 1)
+
+        return True
+
+    def update_cache_rows(self, y_start: int, y_end: int) -> bool:
+        """
+        Rasterizes the rows from `y_start` up to `y_end` (excluded) again
+        and splices them into the cache, which becomes current. Every other
+        row must be unchanged since the cache was made. Returns False, and
+        leaves the cache stale, when the rows cannot be rasterized.
+        """
+        clip = self.cachedClip
+        convex = self.topology.convex
+        table = None if convex else EdgeTable.from_polygon(self)
+
+        y0, y1 = y_start, y_end
+        if clip is not None:
+            y0, y1 = max(y0, clip[1]), min(y1, clip[3])
+
+        try:
+            if y0 >= y1:
+                lines = []
+            elif convex:
+                x0, x1 = -sys.maxsize, sys.maxsize
+                if clip is not None:
+                    x0, x1 = clip[0], clip[2]
+
+                lines = self.get_convex_spans((x0, y0, x1, y1))
+            elif clip is None:
+                lines = list(get_table_spans(table, y0, y1))
+            else:
+                lines = list(
+                    get_clipped_spans(table, (clip[0], y0, clip[2], y1))
+                )
+        except ValueError:
+            return False
+
+        if y0 < y1:
+            self.cachedLines.splice(y0, y1, lines)
+
+        self.cachedEdgeTable = table
+        self.cachedVersion = self.geometryVersion
+
+        # -- the outline reaches past the rows of the edges it strokes
+        if self.cachedOutlineThickness != self.outlineThickness:
+            self.update_outline_cache()
+        elif self.outlineThickness > 0:
+            pad = self.outlineThickness + 1
+            o0, o1 = y_start - pad, y_end + pad
+            x0, x1 = -sys.maxsize, sys.maxsize
+            if clip is not None:
+                x0, x1 = clip[0], clip[2]
+                o0, o1 = max(o0, clip[1]), min(o1, clip[3])
+
+            if o0 < o1:
+                self.cachedOutline.splice(o0, o1, get_outline_spans(
+                    self, self.outlineThickness, (x0, o0, x1, o1)
+                ))
+
+        return True
+
+    def translate(self, dx: int, dy: int) -> bool:
+        """
+        Moves every point by (`dx`, `dy`). A current cache is shifted along
+        instead of rasterized again, as long as the clip window did not cut
+        it before the move and does not after it. Returns whether it was.
+        The outline is stroked again instead when its thickness changed.
+        """
+        shift = self.has_cache and self.cachedResult and \
+            self.cachedClip == self.clipRect and \
+            self._inside_clip(0, 0) and self._inside_clip(dx, dy)
+        outline = getattr(self, "cachedOutlineThickness", None) == \
+            self.outlineThickness
+
+        c = self.coords
+        c[0::2] = array("i", [x + dx for x in c[0::2]])
+        c[1::2] = array("i", [y + dy for y in c[1::2]])
+
+        if self._masterCoords is not None:
+            # whole pixels commute with the rounding, keep the float geometry
+            self._offset = (self._offset[0] + dx, self._offset[1] + dy)
+            self.geometryVersion += 1
+        else:
+            self.mark_dirty()
+
+        if not shift:
+            return False
+
+        self.cachedLines.shift(dx, dy)
+        self.cachedEdgeTable = None  # built on demand
+        self.cachedVersion = self.geometryVersion
+
+        if outline:
+            self.cachedOutline.shift(dx, dy)
+        else:
+            self.update_outline_cache()
+
+        return True
+
+    def _inside_clip(self, dx: int, dy: int) -> bool:
+        """
+        Whether the polygon and its outline, moved by (`dx`, `dy`), fit in
+        the cached clip window.
+        """
+        if len(self.points) <= 0:
+            return self.cachedClip is None
+
+        return _box_inside(self._bounds(dx, dy), self.cachedClip)
+
+    def _bounds(self, dx: int = 0, dy: int = 0) -> Tuple[int, int, int, int]:
+        """
+        Box holding every span of the polygon and its outline, moved by
+        (`dx`, `dy`).
+        """
+        pad = max(self.outlineThickness, 0) + 1
+        xs = self.coords[0::2]
+        ys = self.coords[1::2]
+
+        return (
+            min(xs) + dx - pad, min(ys) + dy - pad,
+            max(xs) + dx + pad, max(ys) + dy + pad
+        )
+
+    def clip_unchanged(self, clip: Optional[Tuple[int, int, int, int]]) \
+            -> bool:
+        """
+        Whether the current cache clipped to `clip` would hold the same
+        spans as clipped to `cachedClip`: the polygon and its outline lie
+        inside both windows, or outside both.
+        """
+        if not self.has_cache or len(self.points) <= 0:
+            return False
+
+        box = self._bounds()
+        old = self.cachedClip
+
+        return (_box_inside(box, old) and _box_inside(box, clip)) or \
+            (_box_outside(box, old) and _box_outside(box, clip))
+
     def update_points(self, points: List[Tuple[int, int]]) -> bool:
         if len(points) > len(self.points):
             return False
@@ -107,6 +503,7 @@ class PolygonHelper(Polygon):
             p.y = y
             idx += 1
 
+        self.mark_dirty()
         return True
 
     def replace_points(self, points: List[Tuple[int, int]]) -> None:
@@ -126,11 +523,14 @@ class PolygonHelper(Polygon):
                 self.points.append(Point(x, y))
             idx += 1
 
+        self.mark_dirty()
+
     def remove_point(self, idx: int) -> bool:
         if idx >= len(self.points):
             return False
         else:
             del self.points[idx]
+            self.mark_dirty()
             return True
 
     def delete(self) -> bool:
@@ -141,4 +541,72 @@ class PolygonHelper(Polygon):
         return True
 
     def __repr__(self) -> str:
-        return "[Polygon \"{}\"]".format(self.name)
\ No newline at end of file
+        return "[Polygon \"{}\"]".format(self.name)
+
+
+def _box_inside(box: Tuple[int, int, int, int],
+                clip: Optional[Tuple[int, int, int, int]]) -> bool:
+    if clip is None:
+        return True
+
+    return clip[0] <= box[0] and box[2] <= clip[2] and \
+        clip[1] <= box[1] and box[3] < clip[3]
+
+
+def _box_outside(box: Tuple[int, int, int, int],
+                 clip: Optional[Tuple[int, int, int, int]]) -> bool:
+    if clip is None:
+        return False
+
+    return box[2] < clip[0] or clip[2] <= box[0] or \
+        box[3] < clip[1] or clip[3] <= box[1]
+
+
+def materialize_points(polygons: Iterable[PolygonHelper]) -> None:
+    """
+    Computes the points of every polygon left stale by `transform_by` in a
+    single vectorized pass, each with its own transform, or one polygon at
+    a time without NumPy.
+    """
+    stale = [p for p in polygons if p._pointsStale]
+    if len(stale) <= 0:
+        return
+
+    if np is None:
+        for p in stale:
+            p._materialize()
+        return
+
+    counts = np.array(
+        [len(p._masterCoords) // 2 for p in stale], dtype=np.int64
+    )
+    master = np.concatenate([
+        np.frombuffer(p._masterCoords, dtype=np.float64) for p in stale
+    ]).reshape(-1, 2)
+
+    # -- one row of coefficients per polygon, repeated for its vertices
+    coefs = np.repeat(np.array([
+        (T[0][0], T[1][0], T[2][0], T[0][1], T[1][1], T[2][1], tx, ty)
+        for T, (tx, ty) in ((p._transform, p._offset) for p in stale)
+    ], dtype=np.float64).reshape(-1, 8), counts, axis=0)
+
+    x, y = master[:, 0], master[:, 1]
+    xs = np.floor(x * coefs[:, 0] + y * coefs[:, 1] + coefs[:, 2] + 0.5)
+    ys = np.floor(x * coefs[:, 3] + y * coefs[:, 4] + coefs[:, 5] + 0.5)
+
+    out = np.empty((len(master), 2), dtype=np.int32)
+    out[:, 0] = xs.astype(np.int64) + coefs[:, 6].astype(np.int64)
+    out[:, 1] = ys.astype(np.int64) + coefs[:, 7].astype(np.int64)
+    data = out.tobytes()
+
+    start = 0
+    for p in stale:
+        end = start + 4 * len(p._coords)  # int32
+        p._pointsStale = False
+
+        coords = array("i", data[start:end])
+        if coords != p._coords:
+            p._coords[:] = coords
+            p.geometryVersion += 1
+
+        start = end
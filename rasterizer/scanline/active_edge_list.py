@@ -0,0 +1,176 @@
+from typing import Dict, Iterator, List
+import functools
+
+from . raster_state import RasterState
+
+
+class ActiveEdgeList:
+    """
+    `ActiveEdgeList` keeps the edges crossing the current scanline ordered
+    by `x` across rows. Edges only move past each other where they cross, so
+    re-sorting after each step is a near-sorted insertion sort, and expired
+    edges are dropped in a single compaction pass.
+
+    Edges of equal `x` are ordered the same way the former per-row insertion
+    sort ordered them (the later one first), because the expiry rules below
+    depend on which edges are neighbours.
+    """
+
+    def __init__(self):
+        self.edges: List[RasterState] = []
+        self._ending: Dict[int, int] = {}  # y_max -> number of edges
+
+    def insert(self, states: List[RasterState]) -> None:
+        """
+        Inserts each state before the active edges with an equal or greater
+        `x`, using a binary search.
+        """
+        edges = self.edges
+        ending = self._ending
+
+        for st in states:
+            x = st.x
+            lo = 0
+            hi = len(edges)
+
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if edges[mid].x < x:
+                    lo = mid + 1
+                else:
+                    hi = mid
+
+            edges.insert(lo, st)
+            ending[st.y_max] = ending.get(st.y_max, 0) + 1
+
+    def seed(self, states: List[RasterState], y: int) -> None:
+        """
+        Fills the list with `states`, already stepped to scanline `y`, in the
+        order they would have reached by walking every row up to `y`; edges
+        starting on `y` itself are left to `insert`. `states` are given in
+        edge table order.
+        """
+        order = sorted(
+            range(len(states)),
+            key=functools.cmp_to_key(
+                lambda a, b: self._compare(states, y, a, b)
+            )
+        )
+
+        self.edges = [states[i] for i in order]
+        self._ending = {}
+
+        for st in self.edges:
+            self._ending[st.y_max] = self._ending.get(st.y_max, 0) + 1
+
+    @staticmethod
+    def _compare(states: List[RasterState], y: int, a: int, b: int) -> int:
+        """
+        Orders two seeded edges. Each insertion sort reverses the previous
+        order of equal edges, so the first row below `y` where they differ
+        decides, with the sign flipped on every row. Back on the row the
+        younger edge started on, it went in before the older one; edges of
+        the same age went in in reversed table order.
+        """
+        sa = states[a]
+        sb = states[b]
+        ta = y - (sa.y_max - sa.dy)
+        tb = y - (sb.y_max - sb.dy)
+        tm = min(ta, tb)
+
+        sign = 1
+        for d in range(tm + 1):
+            xa = sa.x_at(ta - d)
+            xb = sb.x_at(tb - d)
+
+            if xa != xb:
+                return sign if xa > xb else -sign
+
+            sign = -sign
+
+        sign = 1 if tm % 2 == 1 else -1
+        if ta == tb:
+            return sign if a > b else -sign
+        else:
+            return sign if ta == tm else -sign
+
+    def expire(self, y: int) -> List[int]:
+        """
+        Removes every edge that ends on scanline `y` and returns the `x` of
+        each "inverted V" (two neighbouring edges meeting at the same end
+        point), which the rasterizer emits as a single-pixel span.
+        """
+        if self._ending.pop(y, 0) == 0:
+            return []
+
+        edges = self.edges
+        ln = len(edges)
+        deletes = set()
+        peaks: List[int] = []
+
+        i = 0
+        while i < ln:  # iterate every pair of edges in the AEL
+            rs1 = edges[i]  # n
+            i += 1
+            rs2 = edges[i % ln]  # n + 1, condition for circular list
+
+            if rs1 not in deletes and rs1.y_max == y:
+                if rs1.edge.start == rs2.edge.start:  # V shape
+                    deletes.add(rs1)
+                elif rs1.edge.end == rs2.edge.end:  # Inverted V shape
+                    peaks.append(rs1.x)
+                    deletes.add(rs1)
+                    deletes.add(rs2)
+                else:
+                    deletes.add(rs1)
+            elif rs2 not in deletes and rs2.y_max == y:
+                if rs1.edge.start == rs2.edge.start:  # V shape
+                    deletes.add(rs2)
+
+        # every edge ending on `y` has been visited as `rs1` above
+        self.edges = [st for st in edges if st.y_max > y]
+
+        return peaks
+
+    def advance(self) -> None:
+        """
+        Steps every edge to the next scanline (`RasterState.step`, inlined),
+        then restores the ordering with an insertion sort that only moves
+        edges which crossed.
+        """
+        edges = self.edges
+
+        for st in edges:
+            st.x += st.x_step
+            st.remainder += st.r_step
+
+            if st.dx >= 0:
+                if 2 * st.remainder >= st.dy:
+                    st.x += 1
+                    st.remainder -= st.dy
+            elif -2 * st.remainder >= st.dy:
+                st.x -= 1
+                st.remainder += st.dy
+
+        i = 1
+        ln = len(edges)
+        while i < ln:
+            st = edges[i]
+            x = st.x
+            j = i
+
+            while j > 0 and edges[j - 1].x >= x:
+                edges[j] = edges[j - 1]
+                j -= 1
+
+            edges[j] = st
+            i += 1
+
+    def __iter__(self) -> Iterator[RasterState]:
+        return iter(self.edges)
+
+    def __len__(self) -> int:
+        return len(self.edges)
+
+    def __repr__(self) -> str:
+        return "[ActiveEdgeList {}]".format(self.edges)
@@ -0,0 +1,175 @@
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import chain
+from typing import Callable, Iterable, List, Optional, Tuple
+import os
+import sys
+
+from . edge_table import EdgeTable
+from . scanline import get_table_spans, get_clipped_spans
+from . scene import SceneEdgeTable, rasterize_scene
+
+
+def split_rows(y_start: int, y_end: int, bands: int) \
+        -> List[Tuple[int, int]]:
+    """
+    Splits the rows `y_start` (inclusive) to `y_end` (exclusive) into at most
+    `bands` ranges of nearly equal height.
+    """
+    rows = max(0, y_end - y_start)
+    bands = max(1, min(bands, rows))
+
+    return [
+        (y_start + rows * i // bands, y_start + rows * (i + 1) // bands)
+        for i in range(bands)
+    ]
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+# Bands are sent back as flat `array('i')` buffers of y, x1, x2 integers,
+# which pickle as plain bytes, unlike lists of tuples.
+
+def _table_band(
+    table: EdgeTable,
+    clip: Optional[Tuple[int, int, int, int]],
+    y0: int,
+    y1: int
+) -> array:
+    if clip is None:
+        spans = get_table_spans(table, y0, y1)
+    else:
+        spans = get_clipped_spans(table, (clip[0], y0, clip[2], y1))
+
+    return array("i", chain.from_iterable(spans))
+
+
+def _scene_band(
+    scene: SceneEdgeTable,
+    clip: Optional[Tuple[int, int, int, int]],
+    y0: int,
+    y1: int
+) -> List[array]:
+    if clip is None:
+        clip = (-sys.maxsize, y0, sys.maxsize, y1)
+    else:
+        clip = (clip[0], y0, clip[2], y1)
+
+    return [
+        array("i", chain.from_iterable(spans))
+        for spans in rasterize_scene(scene, clip, vectorized=False)
+    ]
+
+
+def _unpack(buf: array) -> Iterable[Tuple[int, int, int]]:
+    it = iter(buf)
+    return zip(it, it, it)
+
+
+def _row_range(
+    y_range: Tuple[int, int],
+    clip: Optional[Tuple[int, int, int, int]]
+) -> Tuple[int, int]:
+    y_start, y_end = y_range[0], y_range[1] + 1
+
+    if clip is not None:
+        y_start = max(y_start, clip[1])
+        y_end = min(y_end, clip[3])
+
+    return y_start, y_end
+
+
+def _run_bands(
+    fn: Callable,
+    data: object,
+    clip: Optional[Tuple[int, int, int, int]],
+    y_start: int,
+    y_end: int,
+    bands: int,
+    workers: int,
+    executor: Optional[Executor]
+) -> List:
+    args = [
+        (data, clip, y0, y1)
+        for y0, y1 in split_rows(y_start, y_end, bands)
+    ]
+
+    if executor is not None:
+        return list(executor.map(fn, *zip(*args)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, *zip(*args)))
+
+
+def get_banded_spans(
+    table: EdgeTable,
+    bands: int = 0,
+    workers: Optional[int] = None,
+    clip: Optional[Tuple[int, int, int, int]] = None,
+    executor: Optional[Executor] = None
+) -> List[Tuple[int, int, int]]:
+    """
+    `get_banded_spans` splits the rows of an edge table into `bands`
+    horizontal bands (one per worker by default) and rasterizes them in a
+    process pool of `workers` processes, or in `executor` when given. Each
+    band seeds its edges at its top row, and the spans are merged back in
+    row order, the same as `get_table_spans` (or `get_clipped_spans`) gives.
+    """
+    if workers is None:
+        workers = default_workers()
+
+    if bands <= 0:
+        bands = workers
+
+    y_start, y_end = _row_range(table.y_range(), clip)
+    if y_start >= y_end:
+        return []
+
+    spans: List[Tuple[int, int, int]] = []
+
+    for part in _run_bands(
+        _table_band, table, clip, y_start, y_end, bands, workers, executor
+    ):
+        spans += _unpack(part)
+
+    return spans
+
+
+def rasterize_scene_banded(
+    scene: SceneEdgeTable,
+    bands: int = 0,
+    workers: Optional[int] = None,
+    clip: Optional[Tuple[int, int, int, int]] = None,
+    executor: Optional[Executor] = None
+) -> List[List[Tuple[int, int, int]]]:
+    """
+    `rasterize_scene_banded` is `rasterize_scene` split into horizontal
+    bands over a process pool, see `get_banded_spans`.
+    """
+    if workers is None:
+        workers = default_workers()
+
+    if bands <= 0:
+        bands = workers
+
+    out: List[List[Tuple[int, int, int]]] = [[] for _ in scene.tables]
+
+    ranges = [t.y_range() for t in scene.tables if len(t) > 0]
+    if len(ranges) <= 0:
+        return out
+
+    y_start, y_end = _row_range(
+        (min(r[0] for r in ranges), max(r[1] for r in ranges)), clip
+    )
+    if y_start >= y_end:
+        return out
+
+    for part in _run_bands(
+        _scene_band, scene, clip, y_start, y_end, bands, workers, executor
+    ):
+        for spans, more in zip(out, part):
+            spans += _unpack(more)
+
+    return out
@@ -0,0 +1,170 @@
+from typing import Iterable, List, Optional, Tuple
+
+from primitives import Polygon
+
+
+# An edge is (x of its lower end point, lower y, x of its upper end point,
+# upper y).
+Edge = Tuple[int, int, int, int]
+
+
+class ConvexTable:
+    """
+    `ConvexTable` splits the non-horizontal edges of a convex polygon into
+    the two chains running from its lowest to its highest row. Every row in
+    between is crossed by exactly one edge of each chain, so the polygon is
+    rasterized by walking both chains side by side, without the bucketing,
+    sorting and expiry of the general `EdgeTable` rasterizer. The spans are
+    the same as `get_table_spans` gives for the polygon.
+
+    The polygon must be convex (see `Polygon.is_convex`).
+    """
+
+    def __init__(self, up: List[Edge], down: List[Edge]):
+        self.up = sorted(up, key=lambda e: e[1])
+        self.down = sorted(down, key=lambda e: e[1])
+
+        if len(self.up) <= 0 or len(self.down) <= 0:
+            raise ValueError("polygon object must have a non-zero area")
+
+        self.y_min = self.up[0][1]
+        self.y_max = self.up[-1][3]
+
+        # the two chains meeting in a single top vertex make an "inverted
+        # V", which the rasterizer emits as a single-pixel span
+        self.peak: Optional[int] = None
+        if self.up[-1][2:] == self.down[-1][2:]:
+            self.peak = self.up[-1][2]
+
+    @staticmethod
+    def from_polygon(poly: Polygon) -> "ConvexTable":
+        if poly.length < 3:
+            raise ValueError("polygon object must have at least three points")
+
+        up: List[Edge] = []
+        down: List[Edge] = []
+
+        for x1, y1, x2, y2 in poly.edges_iter():
+            if y1 < y2:
+                up.append((x1, y1, x2, y2))
+            elif y1 > y2:
+                down.append((x2, y2, x1, y1))
+
+        return ConvexTable(up, down)
+
+    def __len__(self) -> int:
+        return len(self.up) + len(self.down)
+
+
+def _chain_xs(chain: List[Edge], y_start: int, y_end: int) -> List[int]:
+    """
+    Returns the `x` of `chain` on every row from `y_start` up to `y_end`
+    (excluded), rounded half away from zero like `RasterState.x_at`.
+    """
+    xs: List[int] = []
+
+    for x0, ys, x1, ye in chain:
+        a = max(ys, y_start) - ys
+        b = min(ye, y_end) - ys
+        if a >= b:
+            continue
+
+        dx = x1 - x0
+        dy = ye - ys
+        k = 2 * abs(dx)
+        d = 2 * dy
+
+        if dx == 0:
+            xs.extend([x0] * (b - a))
+        elif dx > 0:
+            xs.extend([x0 + v // d for v in range(k * a + dy, k * b + dy, k)])
+        else:
+            xs.extend([x0 - v // d for v in range(k * a + dy, k * b + dy, k)])
+
+    return xs
+
+
+def get_convex_rows(
+    table: ConvexTable,
+    y_start: Optional[int] = None,
+    y_end: Optional[int] = None
+) -> Tuple[int, List[int], List[int]]:
+    """
+    `get_convex_rows` returns the first row of a convex table from
+    `y_start` (inclusive) to `y_end` (exclusive), and the x1 and x2 of the
+    single span on each row from there on.
+    """
+    y0 = table.y_min if y_start is None else max(table.y_min, y_start)
+    y1 = table.y_max if y_end is None else min(table.y_max, y_end)
+
+    x1: List[int] = []
+    x2: List[int] = []
+
+    if y0 < y1:
+        left = _chain_xs(table.up, y0, y1)
+        right = _chain_xs(table.down, y0, y1)
+        x1 = list(map(min, left, right))
+        x2 = list(map(max, left, right))
+
+    peak = table.peak
+    if peak is not None and y0 <= table.y_max and \
+            (y_end is None or table.y_max < y_end):
+        x1.append(peak)
+        x2.append(peak)
+
+    return y0, x1, x2
+
+
+def get_convex_clipped_rows(
+    table: ConvexTable,
+    clip: Tuple[int, int, int, int]
+) -> Tuple[int, List[int], List[int]]:
+    """
+    `get_convex_rows` for the spans that fall in the window `clip`, (x0, y0,
+    x1, y1) with the upper bounds excluded, clamped to it horizontally.
+    """
+    x0, y0, x1, y1 = clip
+    top, lefts, rights = get_convex_rows(table, y0, y1)
+
+    keep = [
+        i for i, (a, b) in enumerate(zip(lefts, rights)) if a < x1 and b >= x0
+    ]
+    if len(keep) <= 0:
+        return top, [], []
+
+    # both chains bulge outwards, so the rows crossing a vertical strip are
+    # a single run
+    i, j = keep[0], keep[-1] + 1
+
+    return (
+        top + i,
+        [max(a, x0) for a in lefts[i:j]],
+        [min(b, x1) for b in rights[i:j]]
+    )
+
+
+def get_convex_spans(
+    table: ConvexTable,
+    y_start: Optional[int] = None,
+    y_end: Optional[int] = None
+) -> Iterable[Tuple[int, int, int]]:
+    """
+    `get_convex_spans` yields the (y, x1, x2) spans of a convex table for
+    the rows `y_start` (inclusive) to `y_end` (exclusive), one per row.
+    """
+    y0, x1, x2 = get_convex_rows(table, y_start, y_end)
+
+    return zip(range(y0, y0 + len(x1)), x1, x2)
+
+
+def get_convex_clipped_spans(
+    table: ConvexTable,
+    clip: Tuple[int, int, int, int]
+) -> Iterable[Tuple[int, int, int]]:
+    """
+    `get_clipped_spans` for a convex table: the spans that fall in the
+    window `clip`, clamped to it horizontally.
+    """
+    y0, x1, x2 = get_convex_clipped_rows(table, clip)
+
+    return zip(range(y0, y0 + len(x1)), x1, x2)
@@ -0,0 +1,133 @@
+from typing import Dict, Iterable, List, Tuple
+
+from primitives import Line, Polygon
+from . raster_state import RasterState
+
+
+class EdgeTable:
+    """
+    `EdgeTable` buckets the non-horizontal edges of a polygon by their lowest
+    scanline. Buckets live in a dictionary keyed by `ymin`, so insertion is
+    O(1), and the keys are sorted once, which makes the whole construction
+    O(E log E).
+
+    The table is immutable once built: it keeps its own copy of every edge
+    and hands out fresh `RasterState` objects on every request, so it can be
+    rasterized any number of times, over any row range and from several
+    threads at once.
+    """
+
+    def __init__(self, edges: Iterable[Line] = ()):
+        buckets: Dict[int, List[Line]] = {}
+        y_max = None
+
+        for e in edges:  # lower end point first
+            buckets.setdefault(e.start.y, []).append(e)
+
+            if y_max is None or e.end.y > y_max:
+                y_max = e.end.y
+
+        self._buckets: Dict[int, Tuple[Line, ...]] = {
+            k: tuple(v) for k, v in buckets.items()
+        }
+        self._keys: Tuple[int, ...] = tuple(sorted(buckets))
+        self._y_max = y_max
+
+    @staticmethod
+    def from_polygon(poly: Polygon) -> "EdgeTable":
+        if poly.length < 3:
+            raise ValueError("polygon object must have at least three points")
+
+        edges: List[Line] = []
+
+        # horizontal edges are skipped before any `Line` is made
+        for x1, y1, x2, y2 in poly.edges_iter():
+            if y1 < y2:
+                edges.append(Line(x1, y1, x2, y2))
+            elif y1 > y2:
+                edges.append(Line(x2, y2, x1, y1))
+
+        return EdgeTable(edges)
+
+    @staticmethod
+    def _from_coords(coords: Tuple[int, ...]) -> "EdgeTable":
+        return EdgeTable(
+            Line(*coords[i:i + 4]) for i in range(0, len(coords), 4)
+        )
+
+    def __reduce__(self):
+        # pickled as flat end point coordinates, which is much smaller and
+        # faster than the `Line` and `Point` objects
+        coords: List[int] = []
+        for e in self.edges():
+            coords += (e.start.x, e.start.y, e.end.x, e.end.y)
+
+        return EdgeTable._from_coords, (tuple(coords),)
+
+    @staticmethod
+    def _state(e: Line) -> RasterState:
+        return RasterState(
+            e, e.end.y, e.start.x, e.end.x - e.start.x, e.end.y - e.start.y
+        )
+
+    def keys(self) -> Tuple[int, ...]:
+        """
+        Returns the bucket keys in ascending order.
+        """
+        return self._keys
+
+    def y_range(self) -> Tuple[int, int]:
+        """
+        Returns the lowest and highest scanline touched by an edge.
+        """
+        if not self._keys:
+            return 0, 0
+
+        return self._keys[0], self._y_max
+
+    def edges(self) -> Iterable[Line]:
+        """
+        Yields the edges, lower end point first, in table order.
+        """
+        for k in self._keys:
+            yield from self._buckets[k]
+
+    def bucket(self, ymin: int) -> List[RasterState]:
+        return [self._state(e) for e in self._buckets.get(ymin, ())]
+
+    def items(self) -> Iterable[Tuple[int, List[RasterState]]]:
+        for k in self._keys:
+            yield k, self.bucket(k)
+
+    def active_at(self, y: int) -> List[RasterState]:
+        """
+        Returns the edges that started below scanline `y` and reach it,
+        stepped to `y`, in table order.
+        """
+        states: List[RasterState] = []
+
+        for k in self._keys:
+            if k >= y:
+                break
+
+            for e in self._buckets[k]:
+                if e.end.y >= y:
+                    st = self._state(e)
+                    st.seek(y - k)
+                    states.append(st)
+
+        return states
+
+    def to_lists(self) -> Tuple[List[int], List[List[RasterState]]]:
+        """
+        Returns the table in the parallel `bucket_idx`/`bucket_val` form
+        consumed by `get_raster_lines`, with fresh states on every call.
+        """
+        keys = list(self._keys)
+        return keys, [self.bucket(k) for k in keys]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def __repr__(self) -> str:
+        return "[EdgeTable {} buckets]".format(len(self._buckets))
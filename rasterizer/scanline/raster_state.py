@@ -1,6 +1,11 @@
 
 
 class RasterState:
+    __slots__ = (
+        "edge", "y_max", "x", "dx", "dy", "remainder", "x0", "x_step",
+        "r_step"
+    )
+
     def __init__(self, edge, y_max, x, dx, dy, remainder=0):
         self.edge = edge
         self.y_max = y_max
@@ -8,6 +13,49 @@ class RasterState:
         self.dx = dx
         self.dy = dy
         self.remainder = remainder
+        self.x0 = x
+
+        # whole pixels and remainder `x` moves by per scanline, so a row is
+        # stepped in constant time whatever the slope
+        if dy > 0:
+            q, r = divmod(abs(dx), dy)
+            self.x_step = q if dx >= 0 else -q
+            self.r_step = r if dx >= 0 else -r
+        else:
+            self.x_step = 0
+            self.r_step = 0
+
+    def step(self) -> None:
+        """
+        Moves `x` to the next scanline, rounding half away from zero.
+        """
+        self.x += self.x_step
+        self.remainder += self.r_step
+
+        if self.dx >= 0:
+            if 2 * self.remainder >= self.dy:
+                self.x += 1
+                self.remainder -= self.dy
+        elif -2 * self.remainder >= self.dy:
+            self.x -= 1
+            self.remainder += self.dy
+
+    def x_at(self, t: int) -> int:
+        """
+        Returns the `x` of the edge `t` scanlines above its lower end point.
+        """
+        if self.dx >= 0:
+            return self.x0 + (2 * self.dx * t + self.dy) // (2 * self.dy)
+        else:
+            return self.x0 - (-2 * self.dx * t + self.dy) // (2 * self.dy)
+
+    def seek(self, t: int) -> None:
+        """
+        Moves the edge `t` scanlines above its lower end point at once, the
+        same as calling `step` `t` times from there.
+        """
+        self.x = self.x_at(t)
+        self.remainder = self.dx * t - (self.x - self.x0) * self.dy
 
     @property
     def slope(self):
@@ -1,7 +1,14 @@
-from typing import Iterable, Tuple, List
+from typing import Iterable, Tuple, List, Optional, Union, TYPE_CHECKING
+from array import array
+import bisect
+
+if TYPE_CHECKING:
+    import numpy as np
 
 from primitives import Polygon
 from . raster_state import RasterState
+from . edge_table import EdgeTable
+from . active_edge_list import ActiveEdgeList
 
 
 def get_scanline_bucket(poly: Polygon) \
@@ -11,198 +18,215 @@ def get_scanline_bucket(poly: Polygon) \
     to work.
     """
 
-    if len(poly.points) < 3:
-        raise ValueError("polygon object must have at least three points")
-
-    bucket_idx: List[int] = []
-    bucket_val: List[List[RasterState]] = []
+    return EdgeTable.from_polygon(poly).to_lists()
 
-    # -- fill the bucket
-    for e in poly.lines_iter():
-        dt = e.delta()
 
-        if dt.y == 0:
-            continue
+def get_raster_lines(
+    bucket_idx: List[int],
+    bucket_val: List[List[RasterState]]
+) -> Iterable[Tuple[int, int]]:
+    """
+    `get_raster_lines` yields a tuple of two integers for every edge crossing
+    a scanline, (x, y). Every two consecutive tuples share the same `y` and
+    denote the start and end position to fill with color.
+    """
 
-        if dt.y < 0:
-            e.swap_points()
-            dt.invert()  # don't invert?
+    bln = len(bucket_idx)
+    if bln <= 0:
+        return
 
-        esy, eey = e.start.y, e.end.y
-        ymin = min(esy, eey)
-        ymax = max(esy, eey)
+    # -- process the bucket
+    y: int = bucket_idx[0]  # current y
+    aet = ActiveEdgeList()
+    aet.insert(bucket_val[0])
 
-        if ymin == esy:
-            x = e.start.x
-        else:
-            x = e.end.x
+    bi = 1  # next bucket
 
-        if ymin not in bucket_idx:
-            bln = len(bucket_idx)
-            idx = 0
+    while len(aet) > 0:
+        # 1. delete expired edges, yielding the "inverted V" peaks
+        for x in aet.expire(y):
+            yield x, y
+            yield x, y
 
-            if bln == 0:
-                bucket_idx.append(ymin)
-                bucket_val.append([])
-            else:
-                while idx < bln and bucket_idx[idx] < ymin:
-                    idx += 1
+        # 2. insert new edges from SET
+        if bi < bln and y == bucket_idx[bi]:
+            aet.insert(bucket_val[bi])
+            bi += 1
 
-                bucket_idx.insert(idx, ymin)
-                bucket_val.insert(idx, [])
-        else:
-            idx = bucket_idx.index(ymin)
+        if len(aet) <= 0:
+            break
 
-        bucket_val[idx].append(RasterState(e, ymax, x, dt.x, dt.y))
+        # 3. draw lines
+        for st in aet:
+            yield (st.x, y)
 
-    return bucket_idx, bucket_val
+        # 4. update and re-sort current sets
+        aet.advance()
+        y += 1
 
 
-def get_raster_lines(
+def get_raster_spans(
     bucket_idx: List[int],
     bucket_val: List[List[RasterState]]
-) -> Iterable[Tuple[int, int]]:
+) -> Iterable[Tuple[int, int, int]]:
     """
-    `get_raster_lines` yields a tuple of three integers, denoting start
-    and end position to fill with color: (y, x1, x2)
+    `get_raster_spans` yields a tuple of three integers for every span to
+    fill with color, (y, x1, x2). It walks the edges the same way as
+    `get_raster_lines`, but pairs the crossings of each row itself.
+
+    Raises `ValueError` if a row is crossed an odd number of times.
     """
 
-    bln = len(bucket_idx)
-    if bln <= 0:
+    if len(bucket_idx) <= 0:
         return
 
-    # -- process the bucket
-    y: int = bucket_idx.pop(0)  # current y
-    sets: List[RasterState] = []
-
-    bln -= 1  # popped
-
-    tmp: List[RasterState] = bucket_val.pop(0)
-    sln = len(tmp)
-
-    # SORT sets
-    if sln > 0:
-        sets.append(tmp[0])
-
-        sln -= 1
-
-        for st in tmp[1:]:
-            idx = 0
-
-            while idx < len(sets) and sets[idx].x < st.x:
-                idx += 1
-
-            sets.insert(idx, st)
-
-    sln = len(sets)
-    deletes: List[RasterState] = []
-
-    while sln > 0:
-        # 1. delete "single" expired edges
-        if sln > 0:
-            deletes = []
-
-            i = 0
-            while i < sln:  # iterate every pair of edges in the AEL
-                n = i
-                i += 1
-                nx = i % sln  # condition for circular list
-
-                rs1 = sets[n]  # n
-                rs2 = sets[nx]  # n + 1
-
-                # FIXME process "single" deletes
-                if rs2 not in deletes and rs2.edge.start.y == y:
-                    # side: end == start, start == end
-                    if rs1.edge.end == rs2.edge.start:
-                        deletes.append(rs1)
-                    elif rs1.edge.start == rs2.edge.end:
-                        deletes.append(rs2)
-                elif rs1 not in deletes and rs1.edge.end.y == y:
-                    if rs1.edge.start == rs2.edge.start:  # V shape
-                        deletes.append(rs1)
-                    elif rs1.edge.end == rs2.edge.end:  # Inverted V shape
-                        # print("INVERTED V:", sets)  # TODO remove debugging
-                        yield rs1.x, y
-                        yield rs1.x, y
-                        deletes.append(rs1)
-                        deletes.append(rs2)
-                    else:
-                        # FIXME additional conditionals
-                        deletes.append(rs1)
-                elif rs2 not in deletes and rs2.edge.end.y == y:
-                    if rs1.edge.start == rs2.edge.start:  # V shape
-                        # print("V:", sets)  # TODO remove debugging
-                        # yield rs2.x, y
-                        # yield rs2.x, y
-                        deletes.append(rs2)
-
-            for st in deletes:
-                sets.remove(st)
+    aet = ActiveEdgeList()
+    aet.insert(bucket_val[0])
 
-        # 2. insert new edges from SET
-        if bln > 0 and y == bucket_idx[0]:
-            bucket_idx.pop(0)
-            newset = bucket_val.pop(0)
+    yield from _sweep_spans(aet, bucket_idx[0], bucket_idx, bucket_val, 1)
+
+
+def get_table_spans(
+    table: EdgeTable,
+    y_start: Optional[int] = None,
+    y_end: Optional[int] = None
+) -> Iterable[Tuple[int, int, int]]:
+    """
+    `get_table_spans` yields the spans of `get_raster_spans` for the rows
+    `y_start` (inclusive) to `y_end` (exclusive) of an edge table, which is
+    left untouched. The edges crossing `y_start` are stepped to it at once,
+    so the rows below are skipped, not walked.
+    """
 
-            for st in newset:
-                idx = 0
+    keys = table.keys()
+    if len(keys) <= 0:
+        return
 
-                while idx < len(sets) and sets[idx].x < st.x:
-                    idx += 1
+    aet = ActiveEdgeList()
+    y = keys[0]
+    lo = 0
 
-                sets.insert(idx, st)
+    if y_start is not None and y_start > y:
+        y = y_start
+        lo = bisect.bisect_left(keys, y)
+        aet.seed(table.active_at(y), y)
 
-            bln = len(bucket_idx)
+    # only the buckets starting inside the rows get states
+    hi = len(keys)
+    if y_end is not None:
+        hi = max(lo, bisect.bisect_left(keys, y_end))
 
-        # FIXME ??
-        sln = len(sets)
-        if sln <= 0:
-            break
+    bucket_idx = list(keys[lo:hi])
+    bucket_val = [table.bucket(k) for k in bucket_idx]
+    bi = 0
 
-        # 3. draw lines
-        for st in sets:
-            yield (st.x, y)
+    if len(aet) <= 0:  # nothing crosses `y_start`, skip to the next edge
+        if len(bucket_idx) <= 0:
+            return
+
+        y = bucket_idx[0]
+        aet.insert(bucket_val[0])
+        bi = 1
 
-        # 4. delete "double" expired edges
-        # TODO.
-        deletes = []
+    yield from _sweep_spans(aet, y, bucket_idx, bucket_val, bi, y_end)
 
-        for st in sets:
-            if st.y_max <= y:
-                deletes.append(st)
 
-        for st in deletes:
-            sets.remove(st)
+def get_clipped_spans(
+    table: EdgeTable,
+    clip: Tuple[int, int, int, int]
+) -> Iterable[Tuple[int, int, int]]:
+    """
+    `get_clipped_spans` yields the spans of an edge table that fall in the
+    window `clip`, (x0, y0, x1, y1) with the upper bounds excluded, clamped
+    to it horizontally. Rows outside the window are never stepped through.
+    """
+
+    x0, y0, x1, y1 = clip
+
+    for y, sx1, sx2 in get_table_spans(table, y0, y1):
+        if sx1 < x1 and sx2 >= x0:
+            yield y, max(sx1, x0), min(sx2, x1)
 
-        # 5. update current sets
-        for st in sets:
-            st.remainder += st.dx
 
-            if st.dx >= 0:
-                while 2 * st.remainder >= st.dy:
-                    st.x += 1
-                    st.remainder -= st.dy
-            else:
-                while -2 * st.remainder >= st.dy:
-                    st.x -= 1
-                    st.remainder += st.dy
+def _sweep_spans(
+    aet: ActiveEdgeList,
+    y: int,
+    bucket_idx: List[int],
+    bucket_val: List[List[RasterState]],
+    bi: int,
+    y_end: Optional[int] = None
+) -> Iterable[Tuple[int, int, int]]:
+    """
+    Walks the scanlines from `y` until the active edge list runs out or
+    `y_end` is reached, inserting the buckets from `bi` on.
+    """
+
+    bln = len(bucket_idx)
 
-        # 6. sort current sets
-        nst: List[RasterState] = []
-        ln = len(sets)
+    while len(aet) > 0 and (y_end is None or y < y_end):
+        # 1. delete expired edges, yielding the "inverted V" peaks
+        for x in aet.expire(y):
+            yield y, x, x
 
-        if ln > 0:
-            nst.append(sets[0])
+        # 2. insert new edges from SET
+        if bi < bln and y == bucket_idx[bi]:
+            aet.insert(bucket_val[bi])
+            bi += 1
 
-            for st in sets[1:]:
-                idx = 0
+        if len(aet) <= 0:
+            break
 
-                while idx < len(nst) and nst[idx].x < st.x:
-                    idx += 1
+        # 3. draw lines
+        edges = aet.edges
+        if len(edges) % 2 != 0:
+            raise ValueError(
+                "odd number of edge crossings on scanline {}".format(y)
+            )
 
-                nst.insert(idx, st)
+        for i in range(0, len(edges), 2):
+            yield y, edges[i].x, edges[i + 1].x
 
-        sets = nst
-        sln = len(sets)
+        # 4. update and re-sort current sets
+        aet.advance()
         y += 1
+
+
+def fill_raster_spans(
+    bucket_idx: List[int],
+    bucket_val: List[List[RasterState]],
+    out: Union[array, "np.ndarray"]
+) -> int:
+    """
+    `fill_raster_spans` writes the spans of `get_raster_spans` into `out` as
+    consecutive y, x1, x2 integers and returns the number of spans written.
+
+    `out` is either an `array('i')`, which grows when it is too short, or a
+    C-contiguous NumPy array of any shape, which must be large enough.
+    """
+
+    if hasattr(out, "reshape"):
+        # reshaping anything else would copy, and the spans would be lost
+        if not out.flags.c_contiguous:
+            raise ValueError("output buffer must be C-contiguous")
+
+        flat = out.reshape(-1)
+    else:
+        flat = out
+    ln = len(flat)
+    growable = isinstance(flat, array)
+
+    i = 0
+    for y, x1, x2 in get_raster_spans(bucket_idx, bucket_val):
+        if i + 3 <= ln:
+            flat[i] = y
+            flat[i + 1] = x1
+            flat[i + 2] = x2
+        elif growable:
+            del flat[i:]
+            flat.extend((y, x1, x2))
+            ln = len(flat)
+        else:
+            raise ValueError("output buffer is too small")
+        i += 3
+
+    return i // 3
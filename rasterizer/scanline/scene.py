@@ -0,0 +1,285 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . raster_state import RasterState
+from . edge_table import EdgeTable
+from . active_edge_list import ActiveEdgeList
+from . vectorized import has_numpy, np, get_scene_spans_vectorized
+
+
+class SceneEdgeTable:
+    """
+    `SceneEdgeTable` merges the edge tables of many polygons into a single
+    table keyed by `ymin`, each bucket tagged with the id (index) of the
+    polygon it belongs to.
+    """
+
+    def __init__(self, tables: List[EdgeTable]):
+        self.tables = tables
+        self._buckets: Dict[int, List[int]] = {}  # ymin -> polygon ids
+
+        for pid, table in enumerate(tables):
+            for k in table.keys():
+                self._buckets.setdefault(k, []).append(pid)
+
+        self._keys: Tuple[int, ...] = tuple(sorted(self._buckets))
+
+    def keys(self) -> Tuple[int, ...]:
+        return self._keys
+
+    def bucket(self, ymin: int) -> List[Tuple[int, List[RasterState]]]:
+        """
+        Returns fresh states for every polygon with edges starting on `ymin`.
+        """
+        return [
+            (pid, self.tables[pid].bucket(ymin))
+            for pid in self._buckets.get(ymin, ())
+        ]
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def __repr__(self) -> str:
+        return "[SceneEdgeTable {} polygons, {} buckets]".format(
+            len(self.tables), len(self._keys)
+        )
+
+
+def get_scene_spans(
+    scene: SceneEdgeTable,
+    clip: Optional[Tuple[int, int, int, int]] = None
+) -> Iterable[Tuple[int, int, int, int]]:
+    """
+    `get_scene_spans` sweeps every polygon of `scene` at once and yields a
+    tuple of four integers for every span, (y, x1, x2, polygon_id). Each
+    polygon keeps its own active edge list, so its spans are the same as
+    `get_table_spans` gives, but rows no polygon covers are jumped over.
+
+    `clip` works as in `get_clipped_spans`. Raises `ValueError` if a row of
+    a polygon is crossed an odd number of times.
+    """
+
+    out: List[List[Tuple[int, int, int]]] = [[] for _ in scene.tables]
+
+    for pids in _sweep_scene(scene, clip, out):
+        for pid in pids:
+            spans = out[pid]
+
+            for y, x1, x2 in spans:
+                yield y, x1, x2, pid
+
+            spans.clear()
+
+
+def rasterize_scene(
+    scene: SceneEdgeTable,
+    clip: Optional[Tuple[int, int, int, int]] = None,
+    vectorized: Optional[bool] = None
+) -> List[List[Tuple[int, int, int]]]:
+    """
+    `rasterize_scene` runs the sweep of `get_scene_spans` and returns the
+    list of (y, x1, x2) spans of each polygon, by polygon id. With NumPy, the
+    whole scene is rasterized at once by `get_scene_spans_vectorized`, unless
+    `vectorized` is False.
+    """
+
+    if vectorized is None:
+        vectorized = has_numpy()
+
+    if vectorized:
+        return _rasterize_scene_vectorized(scene, clip)
+
+    out: List[List[Tuple[int, int, int]]] = [[] for _ in scene.tables]
+
+    for _ in _sweep_scene(scene, clip, out):
+        pass
+
+    return out
+
+
+def _rasterize_scene_vectorized(
+    scene: SceneEdgeTable,
+    clip: Optional[Tuple[int, int, int, int]]
+) -> List[List[Tuple[int, int, int]]]:
+    spans, bounds = rasterize_scene_arrays(scene, clip)
+
+    rows = list(zip(
+        spans[:, 0].tolist(), spans[:, 1].tolist(), spans[:, 2].tolist()
+    ))
+
+    return [
+        rows[bounds[i]:bounds[i + 1]] for i in range(len(scene))
+    ]
+
+
+def rasterize_scene_arrays(
+    scene: SceneEdgeTable,
+    clip: Optional[Tuple[int, int, int, int]] = None
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    `rasterize_scene_arrays` is the NumPy form of `rasterize_scene`: an
+    (M, 4) int32 array of y, x1, x2, polygon id rows, grouped by polygon
+    and sorted by row within each, along with the bounds of every polygon
+    in it: polygon `i` owns the rows `bounds[i]` to `bounds[i + 1]`.
+
+    With `clip`, the rows and polygons outside the window are never
+    rasterized.
+    """
+    ends: List[int] = []
+    coords: List[int] = []
+
+    for table in scene.tables:
+        for e in table.edges():
+            coords += (e.start.x, e.start.y, e.end.x, e.end.y)
+
+        ends.append(len(coords) // 4)
+
+    edges = np.array(coords, dtype=np.int64).reshape(-1, 4)
+    offsets = np.array([0] + ends, dtype=np.int64)
+
+    if clip is None:
+        spans = get_scene_spans_vectorized(
+            edges[:, :2], edges[:, 2:], offsets
+        )
+    else:
+        x0, y0, x1, y1 = clip
+
+        # -- polygons left or right of the window are dropped, and only the
+        # rows inside it are rasterized
+        counts = np.diff(offsets)
+        xmin = np.minimum(edges[:, 0], edges[:, 2])
+        xmax = np.maximum(edges[:, 0], edges[:, 2])
+        outside = counts <= 0
+        ids = np.flatnonzero(~outside)
+        if len(ids) > 0:
+            starts = offsets[ids]
+            outside[ids] = (np.maximum.reduceat(xmax, starts) < x0) | \
+                (np.minimum.reduceat(xmin, starts) >= x1)
+
+        keep = np.repeat(~outside, counts)
+        counts[outside] = 0
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        edges = edges[keep]
+
+        spans = get_scene_spans_vectorized(
+            edges[:, :2], edges[:, 2:], offsets, y0, y1
+        )
+        spans = spans[(spans[:, 1] < x1) & (spans[:, 2] >= x0)]
+        np.clip(spans[:, 1:3], x0, x1, out=spans[:, 1:3])
+
+    # spans come grouped by polygon
+    bounds = np.searchsorted(spans[:, 3], np.arange(len(scene) + 1))
+
+    return spans, bounds
+
+
+def _sweep_scene(
+    scene: SceneEdgeTable,
+    clip: Optional[Tuple[int, int, int, int]],
+    out: List[List[Tuple[int, int, int]]]
+) -> Iterable[List[int]]:
+    """
+    Appends the spans of each polygon to `out[polygon_id]` one row at a
+    time, yielding after every row the ids of the polygons it appended to.
+    """
+
+    keys = scene.keys()
+    nk = len(keys)
+    if nk <= 0:
+        return
+
+    active: Dict[int, ActiveEdgeList] = {}
+    ki = 0
+    y = keys[0]
+    y_end = None
+
+    if clip is not None:
+        x0, y0, x1, y1 = clip
+        y_end = y1
+
+        if y0 > y:
+            y = y0
+
+            for pid, table in enumerate(scene.tables):
+                states = table.active_at(y)
+                if len(states) > 0:
+                    aet = ActiveEdgeList()
+                    aet.seed(states, y)
+                    active[pid] = aet
+
+            while ki < nk and keys[ki] < y:
+                ki += 1
+
+    while len(active) > 0 or ki < nk:
+        if len(active) <= 0:  # nothing to draw until the next edge starts
+            y = keys[ki]
+
+        if y_end is not None and y >= y_end:
+            break
+
+        # new edges from SET, by polygon
+        new: Dict[int, List[RasterState]] = {}
+        if ki < nk and y == keys[ki]:
+            for pid, states in scene.bucket(y):
+                if pid not in active:
+                    active[pid] = ActiveEdgeList()
+
+                new[pid] = states
+
+            ki += 1
+
+        touched: List[int] = []
+        done: List[int] = []
+
+        for pid, aet in active.items():
+            spans = out[pid]
+
+            # 1. delete expired edges, keeping the "inverted V" peaks
+            peaks = aet.expire(y)
+            for x in peaks:
+                if clip is None or x0 <= x < x1:
+                    spans.append((y, x, x))
+
+            # 2. insert new edges from SET
+            states = new.get(pid)
+            if states is not None:
+                aet.insert(states)
+
+            edges = aet.edges
+            ln = len(edges)
+
+            if ln <= 0:
+                done.append(pid)
+
+                if len(peaks) > 0:
+                    touched.append(pid)
+
+                continue
+
+            if ln % 2 != 0:
+                raise ValueError(
+                    "odd number of edge crossings of polygon {} "
+                    "on scanline {}".format(pid, y)
+                )
+
+            # 3. draw lines
+            if clip is None:
+                for i in range(0, ln, 2):
+                    spans.append((y, edges[i].x, edges[i + 1].x))
+            else:
+                for i in range(0, ln, 2):
+                    sx1 = edges[i].x
+                    sx2 = edges[i + 1].x
+
+                    if sx1 < x1 and sx2 >= x0:
+                        spans.append((y, max(sx1, x0), min(sx2, x1)))
+
+            touched.append(pid)
+
+            # 4. update and re-sort current sets
+            aet.advance()
+
+        for pid in done:
+            del active[pid]
+
+        yield touched
+        y += 1
@@ -0,0 +1,164 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+
+from primitives import Polygon
+
+
+def _fill_convex(
+    origin: Tuple[int, int],
+    points: Sequence[Tuple[float, float]],
+    rows: Dict[int, List[Tuple[int, int]]],
+    y_start: Optional[int] = None,
+    y_end: Optional[int] = None
+) -> None:
+    """
+    Samples the convex polygon `points`, relative to the integer `origin`,
+    at the integer rows and columns it covers and appends the covered
+    [x1, x2) intervals to `rows`. A row the polygon crosses always gets at
+    least one pixel, so thin strokes stay connected. Only rows from
+    `y_start` up to `y_end` are sampled.
+
+    Rounding happens before `origin` is added back, so moving a polygon by
+    whole pixels moves its stroke by exactly as much.
+    """
+    ox, oy = origin
+    ys = [y for _, y in points]
+    ln = len(points)
+
+    y0, y1 = math.ceil(min(ys)), math.ceil(max(ys))
+    if y_start is not None:
+        y0 = max(y0, y_start - oy)
+    if y_end is not None:
+        y1 = min(y1, y_end - oy)
+
+    for y in range(y0, y1):
+        xa, xb = math.inf, -math.inf
+
+        for i in range(ln):
+            (ax, ay), (bx, by) = points[i - 1], points[i]
+            if ay > by:
+                ax, ay, bx, by = bx, by, ax, ay
+
+            if not ay <= y <= by:
+                continue
+
+            if ay == by:
+                xa, xb = min(xa, ax, bx), max(xb, ax, bx)
+            else:
+                x = ax + (bx - ax) * (y - ay) / (by - ay)
+                xa, xb = min(xa, x), max(xb, x)
+
+        if xa > xb:
+            continue
+
+        x1, x2 = math.ceil(xa), math.ceil(xb)
+        if x1 >= x2:
+            x1 = math.floor((xa + xb) / 2 + 0.5)
+            x2 = x1 + 1
+
+        rows.setdefault(y + oy, []).append((x1 + ox, x2 + ox))
+
+
+def merge_spans(
+    rows: Dict[int, List[Tuple[int, int]]],
+    clip: Optional[Tuple[int, int, int, int]] = None
+) -> List[Tuple[int, int, int]]:
+    """
+    Merges the overlapping or touching [x1, x2) intervals of every row into
+    disjoint (y, x1, x2) spans, sorted by row and then by `x`. With `clip`
+    given as (x0, y0, x1, y1), only the part inside it is kept.
+    """
+    spans: List[Tuple[int, int, int]] = []
+
+    for y in sorted(rows):
+        if clip is not None and not clip[1] <= y < clip[3]:
+            continue
+
+        merged: List[List[int]] = []
+        for x1, x2 in sorted(rows[y]):
+            if merged and x1 <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], x2)
+            else:
+                merged.append([x1, x2])
+
+        for x1, x2 in merged:
+            if clip is not None:
+                x1, x2 = max(x1, clip[0]), min(x2, clip[2])
+                if x1 >= x2:
+                    continue
+
+            spans.append((y, x1, x2))
+
+    return spans
+
+
+def get_outline_spans(
+    poly: Polygon,
+    thickness: int,
+    clip: Optional[Tuple[int, int, int, int]] = None
+) -> List[Tuple[int, int, int]]:
+    """
+    `get_outline_spans` strokes the closed outline of `poly` with a pen of
+    `thickness` pixels and returns it as disjoint (y, x1, x2) spans. Every
+    edge becomes a quad centred on it, and the gap on both sides of each
+    vertex is closed with a bevel, like the default `QPen` join.
+    """
+    c = poly.coords
+    pts = list(zip(c[0::2], c[1::2]))
+    ln = len(pts)
+    if ln < 2 or thickness <= 0:
+        return []
+
+    half = thickness / 2
+    y_start = y_end = None
+    if clip is not None:
+        y_start, y_end = clip[1], clip[3]
+
+    rows: Dict[int, List[Tuple[int, int]]] = {}
+    normals: List[Optional[Tuple[float, float]]] = []
+
+    # -- a quad for every edge
+    for i in range(ln):
+        (x1, y1), (x2, y2) = pts[i], pts[(i + 1) % ln]
+        d = math.hypot(x2 - x1, y2 - y1)
+
+        if d == 0:
+            normals.append(None)
+            continue
+
+        nx = -(y2 - y1) / d * half
+        ny = (x2 - x1) / d * half
+        normals.append((nx, ny))
+
+        if y_start is not None and (
+            max(y1, y2) + half < y_start or min(y1, y2) - half >= y_end
+        ):
+            continue
+
+        dx, dy = x2 - x1, y2 - y1
+        _fill_convex(
+            (x1, y1),
+            [(nx, ny), (dx + nx, dy + ny), (dx - nx, dy - ny), (-nx, -ny)],
+            rows, y_start, y_end
+        )
+
+    # -- bevels between consecutive edges
+    for i in range(ln):
+        n1, n2 = normals[i - 1], normals[i]
+        if n1 is None or n2 is None:
+            continue
+
+        x, y = pts[i]
+        if y_start is not None and (
+            y + half < y_start or y - half >= y_end
+        ):
+            continue
+
+        for s in (1, -1):
+            _fill_convex(
+                (x, y),
+                [(0, 0), (s * n1[0], s * n1[1]), (s * n2[0], s * n2[1])],
+                rows, y_start, y_end
+            )
+
+    return merge_spans(rows, clip)
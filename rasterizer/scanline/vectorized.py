@@ -0,0 +1,448 @@
+from typing import List, Optional, Tuple
+import functools
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, see `has_numpy`
+    np = None
+
+from primitives import Polygon
+
+
+def has_numpy() -> bool:
+    return np is not None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("the vectorized rasterizer requires NumPy")
+
+
+def polygon_to_array(poly: Polygon) -> "np.ndarray":
+    """
+    Returns the vertices of `poly` as an (N, 2) int32 array.
+    """
+    _require_numpy()
+
+    return np.frombuffer(poly.coords, dtype=np.int32).reshape(-1, 2).copy()
+
+
+def _step_x(x0, dx, dy, t):
+    """
+    Closed form of the `RasterState` stepping: the `x` of an edge `t` rows
+    above its lower end point, rounded half away from zero.
+    """
+    return x0 + np.sign(dx) * ((2 * np.abs(dx) * t + dy) // (2 * dy))
+
+
+def _compare_active(x0, y0, dx, dy, y: int, a: int, b: int) -> int:
+    """
+    Orders two active edges of equal `x` on row `y` the way `ActiveEdgeList`
+    does. Each insertion sort reverses the previous order of equal edges, so
+    the first row below where they differ decides, with the sign flipped on
+    every row. Back on the row the younger edge started on, it goes after
+    the older one on odd rows and before it on even rows; edges of the same
+    age keep the order of their bucket.
+    """
+    ta = int(y - y0[a])
+    tb = int(y - y0[b])
+    tm = min(ta, tb)
+
+    d = np.arange(tm + 1)
+    xa = _step_x(x0[a], dx[a], dy[a], ta - d)
+    xb = _step_x(x0[b], dx[b], dy[b], tb - d)
+
+    diff = np.flatnonzero(xa != xb)
+    if len(diff) > 0:
+        d = int(diff[0])
+        sign = 1 if d % 2 == 0 else -1
+        return sign if xa[d] > xb[d] else -sign
+
+    sign = 1 if tm % 2 == 1 else -1
+    if ta == tb:
+        return sign if a > b else -sign
+    else:
+        return sign if ta == tm else -sign
+
+
+def _scan_peaks(
+    starts: List[Tuple[int, int]],
+    ends: List[Tuple[int, int]],
+    ending: List[bool],
+    xs: List[int],
+    circular: bool
+) -> List[int]:
+    """
+    Runs the pair scan of `ActiveEdgeList.expire` over a row (`circular`) or
+    over a run of ending edges framed by two edges that do not end.
+    """
+    ln = len(xs)
+    deletes = set()
+    peaks: List[int] = []
+
+    for i in range(ln if circular else ln - 1):
+        j = (i + 1) % ln
+
+        if i not in deletes and ending[i]:
+            if starts[i] == starts[j]:  # V shape
+                deletes.add(i)
+            elif ends[i] == ends[j]:  # Inverted V shape
+                peaks.append(xs[i])
+                deletes.add(i)
+                deletes.add(j)
+            else:
+                deletes.add(i)
+        elif j not in deletes and ending[j]:
+            if starts[i] == starts[j]:  # V shape
+                deletes.add(j)
+
+    return peaks
+
+
+def _get_peaks(x0, y0, dx, dy, lo, hi, rows_lo=None, rows_hi=None) \
+        -> "np.ndarray":
+    """
+    Returns the (y, x) "inverted V" peaks emitted by `get_raster_lines`,
+    only those on the rows `rows_lo` to `rows_hi` (excluded) of the edges
+    ending there when given.
+
+    A peak is looked up on the rows where two edges end on the same point,
+    using the edge order `ActiveEdgeList` has on that row before the expiry:
+    by `x`, then by descending `x` on the row below, then edges that were
+    already active before the ones that just started (see `_compare_active`
+    for edges that are equal on both rows).
+    """
+    # -- rows where at least two edges share an end point
+    _, inv, counts = np.unique(
+        hi, axis=0, return_inverse=True, return_counts=True
+    )
+    shared = counts[inv.reshape(-1)] > 1
+    if rows_lo is not None:
+        shared &= (hi[:, 1] >= rows_lo) & (hi[:, 1] < rows_hi)
+    if not shared.any():
+        return np.empty((0, 2), dtype=np.int64)
+
+    rows = np.unique(hi[shared, 1])
+
+    # -- active edges on those rows, edges are active on (ymin, ymax]
+    lower = np.searchsorted(rows, y0, side="right")
+    cnt = np.searchsorted(rows, y0 + dy, side="right") - lower
+
+    edge = np.repeat(np.arange(len(dy)), cnt)
+    ys = rows[
+        np.arange(int(cnt.sum())) -
+        np.repeat(np.cumsum(cnt) - cnt - lower, cnt)
+    ]
+    t = ys - y0[edge]
+    ex0 = x0[edge]
+    edx = dx[edge]
+    edy = dy[edge]
+
+    xs = _step_x(ex0, edx, edy, t)
+    xp = _step_x(ex0, edx, edy, t - 1)
+
+    order = np.lexsort((edge, t == 1, -xp, xs, ys))
+    edge = edge[order]
+    ys = ys[order]
+    xs = xs[order]
+    xp = xp[order]
+    t = t[order]
+
+    # edges that were also equal on the row below need the full comparison
+    same = (ys[1:] == ys[:-1]) & (xs[1:] == xs[:-1])
+    deep = same & (xp[1:] == xp[:-1]) & (t[1:] != 1) & (t[:-1] != 1)
+
+    if deep.any():
+        groups = np.flatnonzero(np.append(True, ~same))
+        ends = np.append(groups[1:], len(ys))
+        g = np.unique(
+            np.searchsorted(groups, np.flatnonzero(deep), side="right") - 1
+        )
+        gs = groups[g]
+        ge = ends[g]
+
+        def resolve(mask):
+            for s, e in zip(gs[mask].tolist(), ge[mask].tolist()):
+                y = int(ys[s])
+                edge[s:e] = sorted(
+                    edge[s:e].tolist(),
+                    key=functools.cmp_to_key(
+                        lambda a, b: _compare_active(x0, y0, dx, dy, y, a, b)
+                    )
+                )
+
+        # only the order next to ending edges matters to the pair scan, and
+        # the two sides of a peak only when their neighbours tell them apart
+        ending = t == dy[edge]
+        cum = np.append(0, np.cumsum(ending))
+        near = (cum[ge] > cum[gs]) | ending[np.minimum(ge, len(ys) - 1)] & \
+            (ge < len(ys)) & (ys[np.minimum(ge, len(ys) - 1)] == ys[gs])
+        pair = (ge - gs == 2) & ending[gs] & ending[gs + 1]
+        resolve(near & ~pair)
+
+        ending = ys - y0[edge] == dy[edge]
+        row_s = np.searchsorted(ys, ys[gs], side="left")
+        row_e = np.searchsorted(ys, ys[gs], side="right")
+        a = edge[gs]
+        b = edge[gs + 1]
+        p = edge[gs - 1]
+        n = np.minimum(ge, len(ys) - 1)
+        symmetric = pair & ~(ending[row_s] & ending[row_e - 1]) & (
+            (gs == row_s) | ~ending[gs - 1] &
+            np.any(lo[p] != lo[a], axis=1) &
+            np.any(lo[p] != lo[b], axis=1)
+        ) & ((ge == row_e) | ~ending[n])
+        resolve(pair & ~symmetric)
+
+    t = ys - y0[edge]
+    ending = t == dy[edge]
+
+    # -- runs of consecutive ending edges within a row
+    ln = len(ys)
+    first = np.ones(ln, dtype=bool)
+    first[1:] = ys[1:] != ys[:-1]
+    last = np.ones(ln, dtype=bool)
+    last[:-1] = first[1:]
+
+    brk = first.copy()
+    brk[1:] |= ~ending[:-1]
+    run_start = np.flatnonzero(ending & brk)
+    brk = last.copy()
+    brk[:-1] |= ~ending[1:]
+    run_end = np.flatnonzero(ending & brk) + 1
+
+    # a row starting and ending with ending edges wraps around, so it is
+    # scanned whole
+    row_start = np.flatnonzero(first)
+    row_end = np.append(row_start[1:], ln)
+    wrap = ending[row_start] & ending[row_end - 1]
+    wrapped = wrap[np.cumsum(first)[run_start] - 1]
+
+    run_len = run_end - run_start
+    keep = (run_len > 1) & ~wrapped
+    run_start = run_start[keep]
+    run_end = run_end[keep]
+    run_len = run_len[keep]
+
+    at_first = first[run_start]
+    at_last = last[run_end - 1]
+
+    # -- pairs framed by non-ending edges are checked at once
+    fast = run_len == 2
+    a = edge[run_start[fast]]
+    b = edge[run_start[fast] + 1]
+    p = edge[np.maximum(run_start[fast] - 1, 0)]
+    hit = np.any(lo[a] != lo[b], axis=1) & np.all(hi[a] == hi[b], axis=1)
+    hit &= at_first[fast] | np.any(lo[p] != lo[a], axis=1)
+
+    peaks_y = [ys[run_start[fast][hit]]]
+    peaks_x = [xs[run_start[fast][hit]]]
+
+    # -- everything else replays the pair scan
+    rest = ~fast
+    slow: List[Tuple[int, int, bool]] = []
+    for s, e, f, la in zip(run_start[rest].tolist(),
+                           run_end[rest].tolist(),
+                           at_first[rest].tolist(),
+                           at_last[rest].tolist()):
+        # frame the run with the edges next to it within the row
+        slow.append((s if f else s - 1, e if la else e + 1, False))
+
+    for r in np.flatnonzero(wrap).tolist():
+        slow.append((int(row_start[r]), int(row_end[r]), True))
+
+    for s, e, circular in slow:
+        idx = edge[s:e]
+        found = _scan_peaks(
+            list(map(tuple, lo[idx].tolist())),
+            list(map(tuple, hi[idx].tolist())),
+            ending[s:e].tolist(),
+            xs[s:e].tolist(),
+            circular
+        )
+        peaks_y.append(np.full(len(found), ys[s], dtype=np.int64))
+        peaks_x.append(np.array(found, dtype=np.int64))
+
+    return np.stack(
+        (np.concatenate(peaks_y), np.concatenate(peaks_x)),
+        axis=1
+    )
+
+
+def get_raster_spans_vectorized(
+    vertices: "np.ndarray",
+    out: Optional["np.ndarray"] = None
+) -> "np.ndarray":
+    """
+    `get_raster_spans_vectorized` rasterizes the polygon given by an (N, 2)
+    int32 array of vertices and returns every span as one contiguous (M, 3)
+    int32 array of rows: y, x1, x2.
+
+    Every edge/scanline crossing is computed at once with the closed form of
+    the `RasterState` stepping, so the result is the same as pairing the
+    output of `get_raster_lines`. An `out` buffer with at least M rows may be
+    given to avoid the allocation; the filled part of it is returned.
+    """
+    _require_numpy()
+
+    v = np.asarray(vertices, dtype=np.int64).reshape(-1, 2)
+    if len(v) < 3:
+        raise ValueError("polygon object must have at least three points")
+
+    p = v
+    q = np.roll(v, -1, axis=0)
+
+    # -- build the edge table, lower end point first
+    keep = p[:, 1] != q[:, 1]
+    p = p[keep]
+    q = q[keep]
+
+    swap = p[:, 1] > q[:, 1]
+    lo = np.where(swap[:, None], q, p)
+    hi = np.where(swap[:, None], p, q)
+
+    return _get_spans(lo, hi, out)
+
+
+def _get_spans(
+    lo: "np.ndarray",
+    hi: "np.ndarray",
+    out: Optional["np.ndarray"],
+    rows_lo: Optional["np.ndarray"] = None,
+    rows_hi: Optional["np.ndarray"] = None
+) -> "np.ndarray":
+    """
+    Rasterizes the non-horizontal edges going from `lo` up to `hi`, (E, 2)
+    int64 arrays in edge table order. With `rows_lo` and `rows_hi`, each
+    edge is only crossed on the rows from its `rows_lo` up to its `rows_hi`
+    (excluded), and the rows outside are never computed.
+    """
+    x0 = lo[:, 0]
+    y0 = lo[:, 1]
+    dx = hi[:, 0] - x0
+    dy = hi[:, 1] - y0
+
+    # -- every crossing, edges are drawn on [ymin, ymax)
+    if rows_lo is None:
+        first = np.zeros_like(dy)
+        n = dy
+    else:
+        first = np.clip(rows_lo - y0, 0, dy)
+        n = np.clip(rows_hi - y0, 0, dy) - first
+        n = np.maximum(n, 0)
+
+    total = int(n.sum())
+    t = np.arange(total, dtype=np.int64) + \
+        np.repeat(first - (np.cumsum(n) - n), n)
+
+    xs = np.repeat(x0, n) + np.repeat(np.sign(dx), n) * (
+        (np.repeat(2 * np.abs(dx), n) * t + np.repeat(dy, n)) //
+        np.repeat(2 * dy, n)
+    )
+    ys = np.repeat(y0, n) + t
+
+    # sort by row, then by x, packed into a single key
+    xmin = int(min(x0.min(), hi[:, 0].min())) if total > 0 else 0
+    ymin = int(ys.min()) if total > 0 else 0
+    width = int(max(x0.max(), hi[:, 0].max())) - xmin + 1 \
+        if total > 0 else 1
+
+    # the rows are read back from the keys, not counted over the whole
+    # range, which the clipped rows of a scene may leave mostly empty
+    ys -= ymin
+    keys = np.sort(ys * width + (xs - xmin))
+    ys, xs = np.divmod(keys, width)
+    ys += ymin
+    xs += xmin
+
+    # -- "inverted V" peaks go first within their row
+    peaks = _get_peaks(x0, y0, dx, dy, lo, hi, rows_lo, rows_hi)
+    npk = len(peaks)
+    ln = total // 2 + npk
+
+    if out is None:
+        out = np.empty((ln, 3), dtype=np.int32)
+    elif len(out) < ln:
+        raise ValueError("output buffer is too small: {} < {}".format(
+            len(out), ln
+        ))
+
+    spans = out[:ln]
+    pairs = np.ones(ln, dtype=bool)
+
+    if npk > 0:
+        peaks = peaks[np.lexsort((peaks[:, 1], peaks[:, 0]))]
+        at = np.searchsorted(ys[::2], peaks[:, 0]) + np.arange(npk)
+        pairs[at] = False
+
+        spans[at, 0] = peaks[:, 0]
+        spans[at, 1] = peaks[:, 1]
+        spans[at, 2] = peaks[:, 1]
+
+    spans[pairs, 0] = ys[::2]
+    spans[pairs, 1] = xs[::2]
+    spans[pairs, 2] = xs[1::2]
+
+    return spans
+
+
+def get_scene_spans_vectorized(
+    lo: "np.ndarray",
+    hi: "np.ndarray",
+    offsets: "np.ndarray",
+    y_start: Optional[int] = None,
+    y_end: Optional[int] = None
+) -> "np.ndarray":
+    """
+    `get_scene_spans_vectorized` rasterizes many polygons at once and returns
+    an (M, 4) int32 array of rows: y, x1, x2, polygon_id, grouped by polygon.
+
+    `lo` and `hi` hold the lower and upper end points of the non-horizontal
+    edges of every polygon, in edge table order; polygon `i` owns the edges
+    `offsets[i]` to `offsets[i + 1]`. The polygons are moved onto rows of
+    their own, so they never meet, and rasterized as a single edge set.
+
+    Only the rows from `y_start` (inclusive) to `y_end` (exclusive) are
+    rasterized when given; the edges are crossed on those rows alone.
+    """
+    _require_numpy()
+
+    lo = np.asarray(lo, dtype=np.int64).reshape(-1, 2)
+    hi = np.asarray(hi, dtype=np.int64).reshape(-1, 2)
+    offsets = np.asarray(offsets, dtype=np.int64)
+
+    counts = np.diff(offsets)
+    ids = np.flatnonzero(counts > 0)
+    if len(ids) <= 0:
+        return np.empty((0, 4), dtype=np.int32)
+
+    starts = offsets[ids]
+    ymin = np.minimum.reduceat(lo[:, 1], starts)
+    ymax = np.maximum.reduceat(hi[:, 1], starts)
+
+    # -- stack the polygons one above the other, a row apart
+    height = ymax - ymin + 2
+    base = np.cumsum(height) - height
+    shift = np.repeat(base - ymin, counts[ids])
+
+    lo = lo.copy()
+    hi = hi.copy()
+    lo[:, 1] += shift
+    hi[:, 1] += shift
+
+    rows_lo = rows_hi = None
+    if y_start is not None or y_end is not None:
+        big = np.iinfo(np.int64).max // 4
+        rows_lo = shift + (-big if y_start is None else y_start)
+        rows_hi = shift + (big if y_end is None else y_end)
+
+    spans = _get_spans(lo, hi, None, rows_lo, rows_hi)
+
+    which = np.searchsorted(base, spans[:, 0], side="right") - 1
+
+    out = np.empty((len(spans), 4), dtype=np.int32)
+    out[:, 0] = spans[:, 0] - (base - ymin)[which]
+    out[:, 1:3] = spans[:, 1:3]
+    out[:, 3] = ids[which]
+
+    return out
@@ -0,0 +1,122 @@
+from typing import Dict, List, MutableSequence, Optional, Tuple
+import bisect
+
+from . span_cache import SpanCache
+
+
+class SpanBuffer:
+    """
+    `SpanBuffer` keeps, for every row, the sorted and disjoint intervals
+    [x1, x2) already covered by opaque spans, stored flat as x1, x2, x1,
+    x2, ... so both lookups and merges are a binary search.
+    """
+
+    def __init__(self):
+        self._rows: Dict[int, List[int]] = {}
+
+    def visible(self, y: int, x1: int, x2: int) -> List[Tuple[int, int]]:
+        """
+        Returns the parts of the span [x1, x2) on row `y` not covered yet.
+        """
+        parts: List[int] = []
+        _visible_into(self._rows.get(y), x1, x2, parts)
+
+        return list(zip(parts[0::2], parts[1::2]))
+
+    def visible_spans(self, spans: SpanCache) -> SpanCache:
+        """
+        Returns the parts of every span of `spans` not covered yet, as a
+        `SpanCache` over the same rows, without a tuple per span.
+        """
+        out = SpanCache()
+        out.y0 = spans.y0
+        offsets = out.offsets
+        xs = out.xs
+        src = spans.xs
+        rows = self._rows
+
+        for i in range(len(spans.offsets) - 1):
+            a, b = spans.offsets[i] << 1, spans.offsets[i + 1] << 1
+            row = rows.get(spans.y0 + i)
+
+            for j in range(a, b, 2):
+                _visible_into(row, src[j], src[j + 1], xs)
+
+            offsets.append(len(xs) >> 1)
+
+        return out
+
+    def insert(self, y: int, x1: int, x2: int) -> None:
+        """
+        Marks the span [x1, x2) on row `y` as covered, merging it with the
+        intervals it overlaps or touches.
+        """
+        if x1 >= x2:
+            return
+
+        row = self._rows.get(y)
+        if row is None:
+            self._rows[y] = [x1, x2]
+            return
+
+        lo = bisect.bisect_left(row, x1)
+        if lo % 2 == 1:
+            lo -= 1
+            x1 = row[lo]
+
+        hi = bisect.bisect_right(row, x2)
+        if hi % 2 == 1:
+            x2 = row[hi]
+            hi += 1
+
+        row[lo:hi] = [x1, x2]
+
+    def insert_spans(self, spans: SpanCache) -> None:
+        """
+        `insert` for every span of `spans`.
+        """
+        for y, xs in spans.rows():
+            for i in range(0, len(xs), 2):
+                self.insert(y, xs[i], xs[i + 1])
+
+    def clear(self) -> None:
+        self._rows.clear()
+
+    def __repr__(self) -> str:
+        return "[SpanBuffer {} rows]".format(len(self._rows))
+
+
+def _visible_into(row: Optional[List[int]],
+                  x1: int,
+                  x2: int,
+                  out: MutableSequence[int]) -> None:
+    """
+    Appends the x1, x2 of the parts of [x1, x2) not covered by the flat
+    intervals of `row` to `out`.
+    """
+    if row is None:
+        if x1 < x2:
+            out.append(x1)
+            out.append(x2)
+        return
+
+    ln = len(row)
+
+    i = bisect.bisect_right(row, x1)
+    x = x1
+    if i % 2 == 1:  # x1 is covered up to the end of its interval
+        x = row[i]
+        i += 1
+
+    while x < x2:
+        if i >= ln or row[i] >= x2:
+            out.append(x)
+            out.append(x2)
+            break
+
+        if row[i] > x:
+            out.append(x)
+            out.append(row[i])
+
+        x = row[i + 1]
+        i += 2
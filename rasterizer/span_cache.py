@@ -0,0 +1,297 @@
+from array import array
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, see `SpanCache.to_numpy`
+    np = None
+
+
+class SpanCache:
+    """
+    `SpanCache` stores the (y, x1, x2) spans of a polygon in two `array('i')`
+    buffers instead of a list of tuples. The spans are kept in row order,
+    their x1, x2 pairs flat in `xs`, and `offsets` holds the index of the
+    first span of every row from `y0` on, followed by the span count, so a
+    row is a slice of `xs` (compressed sparse row layout).
+    """
+
+    def __init__(self):
+        self.y0 = 0
+        self.offsets = array("i", [0])
+        self.xs = array("i")
+
+    @staticmethod
+    def from_spans(spans: Iterable[Tuple[int, int, int]]) -> "SpanCache":
+        """
+        Builds the cache from spans sorted by row, as the scanline functions
+        give them. Raises ValueError when a row comes after a later one.
+        """
+        cache = SpanCache()
+        offsets = cache.offsets
+        xs = cache.xs
+        last = None
+
+        for y, x1, x2 in spans:
+            if last is None:
+                cache.y0 = last = y
+            elif y != last:
+                if y < last:
+                    raise ValueError(
+                        "spans are not sorted by row: {} after {}".format(
+                            y, last
+                        )
+                    )
+
+                offsets.extend(repeat(len(xs) >> 1, y - last))
+                last = y
+
+            xs.append(x1)
+            xs.append(x2)
+
+        if last is not None:
+            offsets.append(len(xs) >> 1)
+
+        return cache
+
+    @staticmethod
+    def from_arrays(ys: "np.ndarray",
+                    x1: "np.ndarray",
+                    x2: "np.ndarray") -> "SpanCache":
+        """
+        `from_spans` for NumPy columns, `ys` sorted, without a Python loop
+        over the spans.
+        """
+        if np is None:
+            raise RuntimeError("SpanCache.from_arrays requires NumPy")
+
+        cache = SpanCache()
+        if len(ys) <= 0:
+            return cache
+
+        ys = np.asarray(ys, dtype=np.int64)
+        cache.y0 = int(ys[0])
+        counts = np.bincount(ys - cache.y0)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int32)
+        np.cumsum(counts, out=offsets[1:])
+
+        xs = np.empty((len(ys), 2), dtype=np.int32)
+        xs[:, 0] = x1
+        xs[:, 1] = x2
+
+        cache.offsets = array("i", offsets.tobytes())
+        cache.xs = array("i", xs.tobytes())
+        return cache
+
+    @staticmethod
+    def from_rows(y0: int, x1: Sequence[int], x2: Sequence[int]) \
+            -> "SpanCache":
+        """
+        `from_spans` for a single span on every row from `y0` on, `x1[i]`
+        to `x2[i]` on row `y0 + i`, built without a loop over the spans.
+        """
+        cache = SpanCache()
+        n = len(x1)
+        if n <= 0:
+            return cache
+
+        cache.y0 = y0
+        cache.offsets = array("i", range(n + 1))
+        cache.xs = array("i", [0]) * (2 * n)
+        cache.xs[0::2] = array("i", x1)
+        cache.xs[1::2] = array("i", x2)
+        return cache
+
+    def splice(self,
+               y_start: int,
+               y_end: int,
+               spans: Iterable[Tuple[int, int, int]]) -> None:
+        """
+        Replaces the rows from `y_start` up to `y_end` (excluded) with
+        `spans`, sorted by row and all inside that range. The rows around
+        them are copied as whole slices of the buffers.
+        """
+        new = SpanCache.from_spans(spans)
+        if len(new) > 0:
+            y0, y1 = new.y_range()
+            if y0 < y_start or y1 > y_end:
+                raise ValueError("spans outside of the spliced rows")
+
+        a, b = self.y_range()
+        offsets = self.offsets
+        xs = self.xs
+
+        # -- (first row, offsets into `xs`, x values), top to bottom
+        parts = []
+        if a < min(y_start, b):
+            n = min(y_start, b) - a
+            parts.append((a, offsets[:n + 1], xs[:offsets[n] << 1]))
+        if len(new) > 0:
+            parts.append((new.y0, new.offsets, new.xs))
+        if max(y_end, a) < b:
+            n = max(y_end, a) - a
+            parts.append((a + n, offsets[n:], xs[offsets[n] << 1:]))
+
+        out_offsets = array("i", [0])
+        out_xs = array("i")
+        last = None
+
+        for y0, part_offsets, part_xs in parts:
+            total = len(out_xs) >> 1
+            if last is None:
+                self.y0 = y0
+            else:
+                out_offsets.extend(repeat(total, y0 - last))
+
+            base = part_offsets[0]
+            out_offsets.extend(
+                total + part_offsets[i] - base
+                for i in range(1, len(part_offsets))
+            )
+            out_xs.extend(part_xs)
+            last = y0 + len(part_offsets) - 1
+
+        if last is None:
+            self.y0 = 0
+
+        self.offsets = out_offsets
+        self.xs = out_xs
+
+    def shift(self, dx: int, dy: int) -> None:
+        """
+        Moves every span by `dx` columns and `dy` rows.
+        """
+        self.y0 += dy
+        if dx == 0 or len(self.xs) <= 0:
+            return
+
+        if np is not None:
+            xs = np.frombuffer(self.xs, dtype=np.int32) + np.int32(dx)
+            self.xs = array("i", xs.tobytes())
+        else:
+            self.xs = array("i", [x + dx for x in self.xs])
+
+    def clipped(self,
+                clip: Tuple[int, int, int, int],
+                keep_empty: bool = True) -> "SpanCache":
+        """
+        Returns the spans inside the window `clip`, (x0, y0, x1, y1) with
+        the upper bounds excluded, clamped to it horizontally like
+        `get_clipped_spans` does. Spans clamped down to no width are left
+        out unless `keep_empty`, as the stroked outline does. The cache
+        itself is returned when the window cuts nothing.
+        """
+        x0, y0, x1, y1 = clip
+        if len(self) <= 0:
+            return SpanCache()
+
+        a, b = self.y_range()
+        if np is not None:
+            ys, lo, hi = self.to_numpy()
+            if y0 <= a and b <= y1 and lo.min() >= x0 and hi.max() < x1 \
+                    and (keep_empty or (lo < hi).all()):
+                return self
+
+            keep = (ys >= y0) & (ys < y1)
+            if keep_empty:
+                keep &= (lo < x1) & (hi >= x0)
+
+            lo = np.maximum(lo, x0)
+            hi = np.minimum(hi, x1)
+            if not keep_empty:
+                keep &= lo < hi
+
+            return SpanCache.from_arrays(ys[keep], lo[keep], hi[keep])
+
+        lo, hi = self.xs[0::2], self.xs[1::2]
+        if y0 <= a and b <= y1 and min(lo) >= x0 and max(hi) < x1 \
+                and (keep_empty or all(l < h for l, h in zip(lo, hi))):
+            return self
+
+        return SpanCache.from_spans(
+            (y, max(lo, x0), min(hi, x1)) for y, lo, hi in self
+            if y0 <= y < y1 and (
+                lo < x1 and hi >= x0 if keep_empty
+                else max(lo, x0) < min(hi, x1)
+            )
+        )
+
+    def y_range(self) -> Tuple[int, int]:
+        """
+        First row and the row past the last one.
+        """
+        return self.y0, self.y0 + len(self.offsets) - 1
+
+    def row(self, y: int) -> memoryview:
+        """
+        Returns the spans of row `y` as a flat x1, x2, x1, x2, ... view.
+        """
+        i = y - self.y0
+        if i < 0 or i >= len(self.offsets) - 1:
+            return memoryview(self.xs)[0:0]
+
+        return memoryview(self.xs)[
+            self.offsets[i] << 1:self.offsets[i + 1] << 1
+        ]
+
+    def rows(self) -> Iterator[Tuple[int, memoryview]]:
+        """
+        Yields every non-empty row as `y` and a view like `row` returns.
+        """
+        view = memoryview(self.xs)
+        offsets = self.offsets
+        y = self.y0
+
+        for i in range(len(offsets) - 1):
+            a, b = offsets[i], offsets[i + 1]
+            if a != b:
+                yield y + i, view[a << 1:b << 1]
+
+    def to_numpy(self) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """
+        Returns the y, x1 and x2 columns as NumPy arrays; `x1` and `x2` are
+        views of `xs`, not copies.
+        """
+        if np is None:
+            raise RuntimeError("SpanCache.to_numpy requires NumPy")
+
+        xs = np.frombuffer(self.xs, dtype=np.int32).reshape(-1, 2)
+        counts = np.diff(np.frombuffer(self.offsets, dtype=np.int32))
+        ys = np.repeat(
+            np.arange(self.y0, self.y0 + len(counts), dtype=np.int32),
+            counts
+        )
+
+        return ys, xs[:, 0], xs[:, 1]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Bytes held by the span buffers, next to a rough estimate of the
+        same spans as a list of tuples of small ints.
+        """
+        xs = self.xs.itemsize * len(self.xs)
+        offsets = self.offsets.itemsize * len(self.offsets)
+
+        return {
+            "spans": len(self),
+            "rows": len(self.offsets) - 1,
+            "xs": xs,
+            "offsets": offsets,
+            "total": xs + offsets,
+            "as_tuples": len(self) * (64 + 8),  # tuple and list slot
+        }
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int]]:
+        for y, row in self.rows():
+            for i in range(0, len(row), 2):
+                yield y, row[i], row[i + 1]
+
+    def __len__(self) -> int:
+        return len(self.xs) >> 1
+
+    def __repr__(self) -> str:
+        y0, y1 = self.y_range()
+        return "[SpanCache {} spans, rows {} to {}, {} bytes]".format(
+            len(self), y0, y1, self.memory_usage()["total"]
+        )
@@ -0,0 +1,190 @@
+from concurrent.futures import Executor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from primitives import Polygon
+from rasterizer.scanline.edge_table import EdgeTable
+from rasterizer.scanline.raster_state import RasterState
+
+
+class TileBin:
+    """
+    `TileBin` is the work list of one screen tile: for every polygon
+    touching it, the edges crossing the tile and a bit mask of the tile rows
+    on which an odd number of edges pass entirely to the left of it, which
+    is all a tile needs to be rasterized on its own.
+    """
+
+    def __init__(self, tx: int, ty: int, size: int):
+        self.tx = tx
+        self.ty = ty
+        self.size = size
+
+        self.edges: Dict[int, List[RasterState]] = {}  # polygon id -> edges
+        self.parity: Dict[int, int] = {}  # polygon id -> row mask
+
+    @property
+    def rect(self) -> Tuple[int, int, int, int]:
+        """
+        Returns the tile as an (x0, y0, x1, y1) window, upper bounds
+        excluded.
+        """
+        s = self.size
+        return self.tx * s, self.ty * s, (self.tx + 1) * s, (self.ty + 1) * s
+
+    def polygons(self) -> List[int]:
+        return sorted(set(self.edges) | set(self.parity))
+
+    def __repr__(self) -> str:
+        return "[TileBin ({}, {}) {} polygons]".format(
+            self.tx, self.ty, len(self.polygons())
+        )
+
+
+def bin_polygons(tables: List[EdgeTable], size: int = 64) \
+        -> Dict[Tuple[int, int], TileBin]:
+    """
+    `bin_polygons` sorts the edges of every polygon (by id, its index in
+    `tables`) into the `size` by `size` tiles they cross. Crossed tiles are
+    found from the exact `x` range of each edge over each row of tiles, and
+    the tiles between two edges only get a parity mask.
+    """
+    bins: Dict[Tuple[int, int], TileBin] = {}
+
+    def get_bin(tx: int, ty: int) -> TileBin:
+        b = bins.get((tx, ty))
+        if b is None:
+            b = bins[(tx, ty)] = TileBin(tx, ty, size)
+
+        return b
+
+    for pid, table in enumerate(tables):
+        # tile row -> last tile column crossed -> rows the edge covers
+        left: Dict[int, Dict[int, int]] = {}
+        right: Dict[int, int] = {}  # tile row -> last tile column
+
+        for e in table.edges():
+            st = RasterState(
+                None, e.end.y, e.start.x, e.end.x - e.start.x,
+                e.end.y - e.start.y
+            )
+            ys = e.start.y
+
+            for ty in range(ys // size, (e.end.y - 1) // size + 1):
+                r0 = max(ys, ty * size)
+                r1 = min(e.end.y, (ty + 1) * size)
+
+                xa = st.x_at(r0 - ys)
+                xb = st.x_at(r1 - 1 - ys)
+                ta = min(xa, xb) // size
+                tb = max(xa, xb) // size
+
+                for tx in range(ta, tb + 1):
+                    get_bin(tx, ty).edges.setdefault(pid, []).append(st)
+
+                mask = ((1 << (r1 - r0)) - 1) << (r0 - ty * size)
+                row = left.setdefault(ty, {})
+                row[tb] = row.get(tb, 0) ^ mask
+                right[ty] = max(right.get(ty, tb), tb)
+
+        # -- tiles right of an edge see it on their left
+        for ty, row in left.items():
+            parity = 0
+
+            for tx in range(min(row), right[ty]):
+                parity ^= row.get(tx, 0)
+
+                if parity != 0:
+                    get_bin(tx + 1, ty).parity[pid] = parity
+
+    return bins
+
+
+def rasterize_tile(tile: TileBin) -> List[Tuple[int, int, int, int]]:
+    """
+    `rasterize_tile` returns the spans of every polygon within a tile as
+    (y, x1, x2, polygon_id), polygon by polygon. A pixel is covered when an
+    odd number of crossings lie at or left of it, which is the coverage of
+    the scanline spans clipped to the tile; zero-width spans are dropped.
+    """
+    x0, y0, x1, y1 = tile.rect
+    spans: List[Tuple[int, int, int, int]] = []
+
+    for pid in tile.polygons():
+        edges = tile.edges.get(pid, ())
+        mask = tile.parity.get(pid, 0)
+
+        for y in range(y0, y1):
+            inside = (mask >> (y - y0)) & 1
+            xs: List[int] = []
+
+            for st in edges:
+                t = y - (st.y_max - st.dy)
+
+                if 0 <= t < st.dy:
+                    x = st.x_at(t)
+
+                    if x < x0:
+                        inside ^= 1
+                    elif x < x1:
+                        xs.append(x)
+
+            xs.sort()
+
+            start = x0 if inside else None
+            for x in xs:
+                if start is None:
+                    start = x
+                else:
+                    if x > start:
+                        spans.append((y, start, x, pid))
+                    start = None
+
+            if start is not None and start < x1:
+                spans.append((y, start, x1, pid))
+
+    return spans
+
+
+def edge_tables(polygons: Iterable[Polygon]) -> List[EdgeTable]:
+    """
+    Returns the edge table of every polygon (the cached one of a
+    `PolygonHelper` when it has one), and an empty table for polygons with
+    less than three points, so that polygon ids stay list indices.
+    """
+    tables: List[EdgeTable] = []
+
+    for p in polygons:
+        if getattr(p, "has_cache", False):
+            tables.append(p.get_edge_table())
+        elif len(p.points) >= 3:
+            tables.append(EdgeTable.from_polygon(p))
+        else:
+            tables.append(EdgeTable())
+
+    return tables
+
+
+def rasterize_tiles(
+    polygons: Iterable[Polygon],
+    size: int = 64,
+    tiles: Optional[Iterable[Tuple[int, int]]] = None,
+    executor: Optional[Executor] = None
+) -> Dict[Tuple[int, int], List[Tuple[int, int, int, int]]]:
+    """
+    `rasterize_tiles` bins the polygons (e.g. a `PolygonFactory`) into tiles
+    and rasterizes every tile independently, or only the (tx, ty) `tiles`
+    given, e.g. the dirty ones. Tiles are handed to `executor` when given.
+    """
+    bins = bin_polygons(edge_tables(polygons), size)
+
+    if tiles is None:
+        work = list(bins.values())
+    else:
+        work = [bins[k] for k in tiles if k in bins]
+
+    if executor is None:
+        results = map(rasterize_tile, work)
+    else:
+        results = executor.map(rasterize_tile, work)
+
+    return {(b.tx, b.ty): spans for b, spans in zip(work, results)}
@@ -0,0 +1,59 @@
+from array import array
+from typing import Optional
+
+from primitives import Polygon
+
+
+class Topology:
+    """
+    `Topology` classifies the outline of a polygon: whether it is convex,
+    simple (no two edges meet but neighbours at their shared point) or
+    self-intersecting, and which way it goes around. Polygons with fewer
+    than three points are none of these.
+
+    Convexity and orientation take a single pass over the points and are
+    worked out at once; `simple` sweeps the edges and is only worked out on
+    first use, from a copy of the points, since a convex polygon is known to
+    be simple without it.
+    """
+
+    def __init__(self, poly: Polygon):
+        self.valid = poly.length >= 3
+        self.convex = self.valid and poly.is_convex()
+        self.clockwise = self.valid and poly.is_clockwise()
+
+        self._simple: Optional[bool] = None
+        self._coords: Optional[array] = None
+
+        if not self.valid:
+            self._simple = False
+        elif self.convex:
+            self._simple = True
+        else:
+            self._coords = array("i", poly.coords)
+
+    @property
+    def simple(self) -> bool:
+        if self._simple is None:
+            self._simple = Polygon.from_list(self._coords).is_simple()
+            self._coords = None
+
+        return self._simple
+
+    @property
+    def self_intersecting(self) -> bool:
+        return self.valid and not self.simple
+
+    def __repr__(self) -> str:
+        if not self.valid:
+            kind = "degenerate"
+        elif self.convex:
+            kind = "convex"
+        elif self.simple:
+            kind = "simple"
+        else:
+            kind = "self-intersecting"
+
+        return "[Topology {}, {}]".format(
+            kind, "clockwise" if self.clockwise else "counterclockwise"
+        )
@@ -0,0 +1,342 @@
+"""
+Renders a scene saved by the editor to a PNG or PPM image without a GUI.
+
+    python render.py scene.json -o scene.png [--size 800x600]
+        [--background 255,255,255] [--band ROWS] [--timing]
+
+Nothing on this path imports PyQt5, so it runs on headless machines.
+"""
+from typing import List, Optional, Sequence, Tuple
+import argparse
+import sys
+import time
+
+from fileio import FileIO
+from imagewriter import get_writer_class
+from rasterizer.polygon_factory import PolygonFactory
+from rasterizer.framebuffer import Framebuffer
+from rasterizer.scanline.convex import ConvexTable, get_convex_clipped_spans
+from rasterizer.scanline.edge_table import EdgeTable
+from rasterizer.scanline.scanline import get_clipped_spans
+from rasterizer.scanline.stroke import get_outline_spans
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    try:
+        w, h = (int(i) for i in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "invalid size: {}, expected WIDTHxHEIGHT".format(text)
+        )
+
+    if w <= 0 or h <= 0:
+        raise argparse.ArgumentTypeError("invalid size: {}".format(text))
+
+    return w, h
+
+
+def parse_color(text: str) -> Tuple[int, int, int, int]:
+    """
+    Accepts "r,g,b", "r,g,b,a", "#rrggbb" or "#rrggbbaa".
+    """
+    try:
+        if text.startswith("#") and len(text) in (7, 9):
+            color = [int(text[i:i + 2], 16) for i in range(1, len(text), 2)]
+        else:
+            color = [int(i) for i in text.split(",")]
+    except ValueError:
+        color = []
+
+    if len(color) == 3:
+        color.append(255)
+
+    if len(color) != 4 or any(i < 0 or i > 255 for i in color):
+        raise argparse.ArgumentTypeError(
+            "invalid color: {}".format(text)
+        )
+
+    return (color[0], color[1], color[2], color[3])
+
+
+def load_scene(fn: str) -> Tuple[PolygonFactory, bool, List[Exception]]:
+    factory = PolygonFactory()
+    ret, exc = FileIO(factory).readFile(fn)
+    return factory, ret, exc
+
+
+def scene_size(factory: PolygonFactory) -> Tuple[int, int]:
+    """
+    The smallest canvas that shows every polygon of `factory` along with
+    its outline.
+    """
+    width = height = 1
+
+    for poly in factory:
+        pad = max(poly.outlineThickness, 0) + 1
+        if poly.length > 0:
+            width = max(width, max(poly.coords[0::2]) + pad)
+            height = max(height, max(poly.coords[1::2]) + pad)
+
+    return width, height
+
+
+def rasterize(factory: PolygonFactory, width: int, height: int) \
+        -> List[Exception]:
+    # same visible rows as `RasterSurface`, 1 to height
+    factory.clipRect = (0, 1, width, height + 1)
+    return factory.update_all_cache()
+
+
+def composite(
+    factory: PolygonFactory,
+    width: int,
+    height: int,
+    background: Tuple[int, int, int, int] = (255, 255, 255, 255)
+) -> Framebuffer:
+    """
+    Composites the cached fills and the stroked outlines back to front onto
+    `background`, the way `RasterSurface` paints them.
+    """
+    fb = Framebuffer(width, height)
+    fb.clear(background)
+    clip = (0, 1, width, height + 1)
+
+    for poly in reversed(factory):
+        if len(poly.points) <= 0:
+            continue
+
+        if poly.has_cache and poly.fillColor[3] != 0:
+            fb.composite_spans(poly.cachedLines, poly.fillColor)
+
+        if poly.outlineThickness > 0 and poly.outlineColor[3] != 0:
+            if poly.has_cache:
+                spans = poly.get_cached_outline()
+            else:
+                spans = get_outline_spans(poly, poly.outlineThickness, clip)
+
+            fb.composite_spans(spans, poly.outlineColor)
+
+    return fb
+
+
+def save_image(fb: Framebuffer, fn: str, alpha: bool = False) -> None:
+    cls = get_writer_class(fn)
+    if cls is None:
+        raise ValueError("unknown image format: {}".format(fn))
+
+    alpha = alpha and cls.__name__ != "PpmWriter"
+    if alpha:
+        pixels = Framebuffer.unpremultiply(fb.pixels)
+    else:
+        pixels = fb.pixels[..., :3].copy()
+
+    with open(fn, "wb") as fp:
+        writer = cls(fp, fb.width, fb.height, alpha)
+        writer.write_rows(pixels)
+        writer.close()
+
+
+def render_streaming(
+    factory: PolygonFactory,
+    fn: str,
+    width: int,
+    height: int,
+    background: Tuple[int, int, int, int] = (255, 255, 255, 255),
+    band: int = 128
+) -> List[Exception]:
+    """
+    Renders `factory` into the image `fn` band by band, top to bottom, so
+    only `band` rows of pixels are held at a time and peak memory grows
+    with the canvas width rather than its area. Each band rasterizes the
+    polygons crossing it from their edge tables, seeded at its first row,
+    or by walking the two chains of the convex ones, and is handed to the
+    encoder as soon as it is composited.
+    """
+    cls = get_writer_class(fn)
+    if cls is None:
+        raise ValueError("unknown image format: {}".format(fn))
+
+    alpha = background[3] != 255 and cls.__name__ != "PpmWriter"
+    errors: List[Exception] = []
+
+    # -- back to front: [polygon, edge table, lowest row, highest row]
+    layers = []
+    for poly in reversed(factory):
+        if len(poly.points) <= 0:
+            continue
+
+        table = None
+        if poly.fillColor[3] != 0:
+            try:
+                if poly.topology.convex:
+                    table = ConvexTable.from_polygon(poly)
+                else:
+                    table = EdgeTable.from_polygon(poly)
+            except Exception as ex:
+                errors.append(ex)
+
+        pad = max(poly.outlineThickness, 0)
+        ys = poly.coords[1::2]
+        layers.append([poly, table, min(ys) - pad, max(ys) + pad])
+
+    band = max(1, band)
+    fb = Framebuffer(width, min(band, height))
+
+    with open(fn, "wb") as fp:
+        writer = cls(fp, width, height, alpha)
+
+        for row in range(0, height, band):
+            rows = min(band, height - row)
+            fb.resize(width, rows)
+            fb.clear(background)
+
+            # screen rows `row` onwards show `y` from `top` downwards
+            top = height - row
+            clip = (0, top - rows + 1, width, top + 1)
+
+            for layer in layers:
+                poly, table, lo, hi = layer
+                if hi < clip[1] or lo >= clip[3]:
+                    continue
+
+                if table is not None:
+                    try:
+                        if isinstance(table, ConvexTable):
+                            spans = list(
+                                get_convex_clipped_spans(table, clip)
+                            )
+                        else:
+                            spans = list(get_clipped_spans(table, clip))
+                    except ValueError as ex:
+                        errors.append(ex)
+                        layer[1] = None
+                    else:
+                        fb.composite_spans(spans, poly.fillColor, top)
+
+                if poly.outlineThickness > 0 and poly.outlineColor[3] != 0:
+                    fb.composite_spans(
+                        get_outline_spans(poly, poly.outlineThickness, clip),
+                        poly.outlineColor,
+                        top
+                    )
+
+            if alpha:
+                writer.write_rows(Framebuffer.unpremultiply(fb.pixels))
+            else:
+                writer.write_rows(fb.pixels[..., :3].copy())
+
+        writer.close()
+
+    return errors
+
+
+def render_file(
+    src: str,
+    dst: str,
+    size: Optional[Tuple[int, int]] = None,
+    background: Tuple[int, int, int, int] = (255, 255, 255, 255)
+) -> Tuple[bool, List[Exception]]:
+    """
+    Renders the scene file `src` into the image `dst`, reporting like
+    `FileIO.readFile`: False when no image was written, along with every
+    exception raised on the way.
+    """
+    factory, ret, exc = load_scene(src)
+    if not ret:
+        return False, exc
+
+    width, height = size or scene_size(factory)
+    exc += rasterize(factory, width, height)
+
+    try:
+        fb = composite(factory, width, height, background)
+        save_image(fb, dst, background[3] != 255)
+    except Exception as ex:
+        exc.append(ex)
+        return False, exc
+
+    return True, exc
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Render a polygon scene to a PNG or PPM image."
+    )
+    parser.add_argument("scene", help="scene file in the JSON format")
+    parser.add_argument("-o", "--output", required=True,
+                        help="output image, .png or .ppm")
+    parser.add_argument("-s", "--size", type=parse_size,
+                        help="canvas size as WIDTHxHEIGHT "
+                             "(default: fit the scene)")
+    parser.add_argument("-b", "--background", type=parse_color,
+                        default=(255, 255, 255, 255),
+                        help="r,g,b[,a] or #rrggbb[aa] (default: white)")
+    parser.add_argument("--band", type=int, default=0, metavar="ROWS",
+                        help="stream the image in bands of ROWS rows "
+                             "instead of holding the whole canvas")
+    parser.add_argument("-t", "--timing", action="store_true",
+                        help="print the time spent in every stage")
+    args = parser.parse_args(argv)
+
+    if get_writer_class(args.output) is None:
+        parser.error("unknown image format: {}".format(args.output))
+
+    timing = []
+    start = time.perf_counter()
+
+    def lap(name: str) -> None:
+        nonlocal start
+        now = time.perf_counter()
+        timing.append((name, now - start))
+        start = now
+
+    factory, ret, exc = load_scene(args.scene)
+    lap("load")
+
+    for ex in exc:
+        print("{}: {}".format(args.scene, ex), file=sys.stderr)
+    if not ret:
+        return 1
+
+    width, height = args.size or scene_size(factory)
+
+    if args.band > 0:
+        # the errors of single polygons are reported but do not fail
+        try:
+            exc = render_streaming(factory, args.output, width, height,
+                                   args.background, args.band)
+        except Exception as ex:
+            print("{}: {}".format(args.output, ex), file=sys.stderr)
+            return 1
+
+        for ex in exc:
+            print("{}: {}".format(args.scene, ex), file=sys.stderr)
+        lap("render")
+    else:
+        for ex in rasterize(factory, width, height):
+            print("{}: {}".format(args.scene, ex), file=sys.stderr)
+        lap("rasterize")
+
+        try:
+            fb = composite(factory, width, height, args.background)
+            lap("composite")
+
+            save_image(fb, args.output, args.background[3] != 255)
+            lap("encode")
+        except Exception as ex:
+            print("{}: {}".format(args.output, ex), file=sys.stderr)
+            return 1
+
+    if args.timing:
+        for name, sec in timing:
+            print("{:<10} {:9.3f} ms".format(name, sec * 1e3),
+                  file=sys.stderr)
+        print("{:<10} {:9.3f} ms".format(
+            "total", sum(sec for _, sec in timing) * 1e3
+        ), file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
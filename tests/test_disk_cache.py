@@ -0,0 +1,162 @@
+"""
+Round trips polygons through `RasterDiskCache` in a temporary directory:
+entries read back as written, the least recently used ones go once the
+size budget is exceeded, and changed polygons are never served stale
+spans.
+
+Run from the repository root: `python -m pytest tests`
+"""
+from typing import List, Optional, Tuple
+import random
+
+from primitives import Point
+from rasterizer.disk_cache import RasterDiskCache
+from rasterizer.polygon_factory import PolygonFactory
+from rasterizer.polygon_helper import PolygonHelper
+from rasterizer.span_cache import SpanCache
+
+Clip = Tuple[int, int, int, int]
+
+
+def make_factory(rnd: random.Random, count: int) -> PolygonFactory:
+    """
+    A factory of `count` random polygons with an outline, rasterized.
+    """
+    factory = PolygonFactory()
+
+    for _ in range(count):
+        poly = factory.create([
+            Point(rnd.randint(0, 40), rnd.randint(0, 40))
+            for _ in range(rnd.randint(3, 8))
+        ])
+        poly.outlineThickness = rnd.choice((1, 2, 3))
+
+    factory.update_all_cache()
+    return factory
+
+
+def dump(cache: SpanCache) -> Tuple[int, List[int], List[int]]:
+    return cache.y0, list(cache.offsets), list(cache.xs)
+
+
+def fresh_cache(poly: PolygonHelper, clip: Optional[Clip]) \
+        -> Tuple[list, list]:
+    """
+    The fill and outline spans of a copy of `poly` rasterized from scratch.
+    """
+    factory = PolygonFactory()
+    factory.clipRect = clip
+
+    copy = factory.create(list(poly.points))
+    copy.outlineThickness = poly.outlineThickness
+    copy.update_cache()
+
+    return list(copy.cachedLines), list(copy.cachedOutline)
+
+
+def test_load_reads_back_what_was_stored(tmp_path):
+    cache = RasterDiskCache(str(tmp_path))
+    factory = make_factory(random.Random(1), 10)
+
+    for p in factory:
+        cache.store(p, p.cachedLines, p.cachedOutline)
+
+    # -- and again from a cache opened over the same directory
+    for disk in (cache, RasterDiskCache(str(tmp_path))):
+        for p in factory:
+            lines, outline = disk.load(p)
+
+            assert dump(lines) == dump(p.cachedLines)
+            assert dump(outline) == dump(p.cachedOutline)
+
+        assert disk.stats()["hits"] == len(factory)
+        assert disk.stats()["entries"] == len(factory)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    # -- the same triangle moved around, so every entry takes as much
+    factory = PolygonFactory()
+    for i in range(6):
+        poly = factory.create([Point(i, 0), Point(i + 30, 5),
+                               Point(i + 10, 25)])
+        poly.outlineThickness = 2
+    factory.update_all_cache()
+
+    cache = RasterDiskCache(str(tmp_path))
+    first, *rest = factory
+
+    cache.store(first, first.cachedLines, first.cachedOutline)
+    budget = 3 * cache.size
+    cache.maxBytes = budget
+
+    for p in rest:
+        cache.store(p, p.cachedLines, p.cachedOutline)
+        assert cache.load(first) is not None  # kept in use
+
+    stats = cache.stats()
+    assert stats["evictions"] > 0
+    assert stats["bytes"] <= budget
+    assert stats["entries"] == len(list(tmp_path.glob("*.spans")))
+
+    assert cache.load(rest[0]) is None
+    assert cache.load(first) is not None
+    assert cache.load(rest[-1]) is not None
+
+    # -- a smaller budget applies when the directory is opened again
+    small = RasterDiskCache(str(tmp_path), maxBytes=budget // 3)
+    assert small.stats()["bytes"] <= budget // 3
+    assert small.stats()["evictions"] > 0
+
+
+def test_changed_polygons_miss(tmp_path):
+    cache = RasterDiskCache(str(tmp_path))
+    factory = make_factory(random.Random(3), 1)
+    poly = factory[0]
+    cache.store(poly, poly.cachedLines, poly.cachedOutline)
+
+    x, y = poly.points[0].x, poly.points[0].y
+    poly.move_point(0, x + 1, y)
+    assert cache.load(poly) is None
+
+    poly.move_point(0, x, y)
+    assert cache.load(poly) is not None
+
+    poly.outlineThickness += 1
+    assert cache.load(poly) is None
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_a_new_clip_is_cut_from_the_stored_spans(tmp_path):
+    """
+    Entries are stored unclipped, so opening the file under another clip
+    window loads them clipped to that window, not to the one they were
+    rasterized under.
+    """
+    rnd = random.Random(4)
+    factory = make_factory(rnd, 8)
+    cache = RasterDiskCache(str(tmp_path))
+    factory.rasterCache = cache
+    factory.clipRect = (5, 5, 30, 30)
+    for p in factory:
+        p.mark_dirty()
+    factory.update_all_cache(storeCache=True)
+
+    assert cache.stats()["writes"] == len(factory)
+
+    for clip in [(0, 10, 20, 35), (100, 100, 120, 120), (5, 5, 30, 30)]:
+        hits = cache.hits
+        other = PolygonFactory()
+        other.rasterCache = cache
+        other.clipRect = clip
+        for p in factory:
+            copy = other.create(list(p.points))
+            copy.outlineThickness = p.outlineThickness
+        other.update_all_cache()
+
+        assert cache.hits == hits + len(factory)
+        for p in other:
+            assert p.cachedClip == clip
+            assert (list(p.cachedLines), list(p.cachedOutline)) == \
+                fresh_cache(p, clip)
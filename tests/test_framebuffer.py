@@ -0,0 +1,107 @@
+"""
+Checks the premultiplied pixels `Framebuffer.composite_spans` leaves
+behind, worked out by hand, and that the QImage the raster surface paints
+outlines into shares them.
+
+Run from the repository root: `python -m pytest tests`
+"""
+import os
+
+import pytest
+
+from rasterizer.framebuffer import Framebuffer, has_numpy
+from rasterizer.span_cache import SpanCache
+
+pytestmark = pytest.mark.skipif(not has_numpy(), reason="requires NumPy")
+
+RED = (255, 0, 0, 128)    # premultiplied: 128, 0, 0, 128
+BLUE = (0, 0, 255, 64)    # premultiplied: 0, 0, 64, 64
+
+
+def composite_overlap() -> Framebuffer:
+    """
+    A 10 by 8 framebuffer with red over x 2 to 6 and blue over x 4 to 8,
+    both on y 5, so on row 8 - 5 = 3.
+    """
+    fb = Framebuffer(10, 8)
+    fb.composite_spans([(5, 2, 6)], RED)
+    fb.composite_spans(SpanCache.from_spans([(5, 4, 8)]), BLUE)
+    return fb
+
+
+def test_premultiply():
+    assert Framebuffer.premultiply(RED) == (128, 0, 0, 128)
+    assert Framebuffer.premultiply(BLUE) == (0, 0, 64, 64)
+    assert Framebuffer.premultiply((10, 20, 30, 0)) == (0, 0, 0, 0)
+
+
+def test_overlapping_spans_blend_over_each_other():
+    fb = composite_overlap()
+    row = fb.pixels[3]
+
+    assert row[:2].tolist() == [[0, 0, 0, 0]] * 2
+    assert row[2:4].tolist() == [[128, 0, 0, 128]] * 2
+
+    # -- blue over red: dst * (255 - 64) / 255 rounded, plus blue,
+    #    128 * 191 / 255 = 95.87, so 96, and alpha 96 + 64
+    assert row[4:6].tolist() == [[96, 0, 64, 160]] * 2
+    assert row[6:8].tolist() == [[0, 0, 64, 64]] * 2
+    assert row[8:].tolist() == [[0, 0, 0, 0]] * 2
+
+    # -- nothing lands on the other rows
+    fb.pixels[3] = 0
+    assert not fb.pixels.any()
+
+
+def test_spans_are_clipped_to_the_framebuffer():
+    fb = Framebuffer(10, 8)
+    fb.clear((0, 255, 0, 255))
+    fb.composite_spans([(5, 2, 6)], RED)
+    fb.composite_spans([(1, -5, 3), (2, 8, 20), (9, 0, 10), (0, 0, 10)],
+                       (0, 0, 255, 255))
+
+    # -- half red over opaque green: 255 * 127 / 255 rounded is 127
+    assert fb.pixels[3, 2].tolist() == [128, 127, 0, 255]
+    assert fb.pixels[7, :3].tolist() == [[0, 0, 255, 255]] * 3
+    assert fb.pixels[7, 3].tolist() == [0, 255, 0, 255]
+    assert fb.pixels[6, 8:].tolist() == [[0, 0, 255, 255]] * 2
+
+    # -- y 9 and y 0 land on rows -1 and 8, outside the framebuffer
+    assert fb.pixels[0].tolist() == [[0, 255, 0, 255]] * 10
+
+    # -- a band of a taller canvas, its top at y 6
+    fb.clear()
+    fb.composite_spans([(5, 0, 1)], BLUE, top=6)
+    assert fb.pixels[1, 0].tolist() == [0, 0, 64, 64]
+
+
+def test_unpremultiply():
+    fb = composite_overlap()
+    straight = Framebuffer.unpremultiply(fb.pixels)
+
+    assert straight[3, 2].tolist() == [255, 0, 0, 128]
+    assert straight[3, 4].tolist() == [153, 0, 102, 160]
+    assert straight[3, 6].tolist() == [0, 0, 255, 64]
+    assert straight[0, 0].tolist() == [0, 0, 0, 0]
+
+
+def test_image_shares_the_pixels():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    pytest.importorskip("PyQt5")
+    from PyQt5.QtGui import QColor, QImage, QPainter
+    from widgets.raster_surface import RasterSurface
+
+    fb = composite_overlap()
+    image = RasterSurface.framebufferImage(fb)
+
+    assert (image.width(), image.height()) == (10, 8)
+    assert image.format() == QImage.Format_RGBA8888_Premultiplied
+    assert image.pixel(4, 3) == 0xa0600040  # premultiplied ARGB
+    assert image.pixelColor(2, 3).getRgb() == (255, 0, 0, 128)
+
+    painter = QPainter(image)
+    painter.setPen(QColor(0, 255, 0))
+    painter.drawPoint(9, 0)
+    painter.end()
+
+    assert fb.pixels[0, 9].tolist() == [0, 255, 0, 255]
@@ -0,0 +1,225 @@
+"""
+Checks the bookkeeping of `PolygonHelper`: the geometry version every
+change of the points bumps, which tells a current cache from a stale one,
+writes through the point views, and the points computed from transforms
+composed lazily.
+
+Run from the repository root: `python -m pytest tests`
+"""
+from typing import Callable, List, Tuple
+import math
+import random
+
+import pytest
+
+from helpers.polygon_transformation_helper import Matrix33, \
+    getRotationMatrix, getScalingMatrix, getSheeringMatrix, \
+    getTranslationMatrix, transformPolygons
+from primitives import Point
+from rasterizer.polygon_factory import PolygonFactory
+from rasterizer.polygon_helper import PolygonHelper, materialize_points
+from rasterizer.scanline.vectorized import has_numpy
+
+needs_numpy = pytest.mark.skipif(not has_numpy(), reason="requires NumPy")
+
+TRIANGLE = [Point(10, 10), Point(30, 12), Point(20, 30)]
+
+
+def make_cached() -> PolygonHelper:
+    poly = PolygonFactory().create(list(TRIANGLE))
+    poly.outlineThickness = 1
+    poly.update_cache()
+
+    assert poly.has_cache
+    return poly
+
+
+MUTATORS = {
+    "add_point": lambda p: p.add_point(5, 5),
+    "insert_point": lambda p: p.insert_point(1, 5, 5),
+    "update_point": lambda p: p.update_point(0, 5, 5),
+    "move_point": lambda p: p.move_point(0, 5, 5),
+    "remove_point": lambda p: p.remove_point(0),
+    "update_points": lambda p: p.update_points([(5, 5), (6, 6)]),
+    "replace_points": lambda p: p.replace_points([(5, 5)] * 4),
+    "points setter": lambda p: setattr(p, "points", TRIANGLE[:2]),
+    "mark_dirty": lambda p: p.mark_dirty(),
+    "translate": lambda p: p.translate(3, -2),
+    "transform_by": lambda p: p.transform_by(
+        ((2, 0, 0), (0, 2, 0), (0, 0, 1))
+    ),
+}
+
+
+@pytest.mark.parametrize("name", list(MUTATORS))
+def test_mutators_bump_the_geometry_version(name):
+    mutate: Callable[[PolygonHelper], object] = MUTATORS[name]
+    poly = make_cached()
+    version = poly.geometryVersion
+
+    mutate(poly)
+
+    if name in ("move_point", "translate"):
+        # -- the cache is spliced or shifted along to the new version
+        assert poly.has_cache
+    else:
+        assert poly.has_stale_cache  # materializes a pending transform
+
+    assert poly.geometryVersion > version
+
+
+def test_transforms_that_move_nothing_keep_the_cache():
+    poly = make_cached()
+    version = poly.geometryVersion
+
+    poly.transform_by(((1, 0, 0), (0, 1, 0), (0.2, -0.3, 1)))
+
+    assert poly.has_cache
+    assert poly.geometryVersion == version
+
+
+def test_failed_edits_keep_the_cache():
+    poly = make_cached()
+    version = poly.geometryVersion
+
+    assert not poly.update_point(3, 5, 5)
+    assert not poly.move_point(3, 5, 5)
+    assert not poly.remove_point(3)
+    assert not poly.update_points([(0, 0)] * 4)
+
+    assert poly.has_cache
+    assert poly.geometryVersion == version
+
+
+def test_writes_through_a_point_update_the_polygon():
+    poly = make_cached()
+    p = poly.points[1]
+
+    p.x = 7
+    assert list(poly.coords) == [10, 10, 7, 12, 20, 30]
+    assert poly.has_stale_cache
+
+    poly.update_cache()
+    p.y += 3
+    assert list(poly.coords) == [10, 10, 7, 15, 20, 30]
+    assert poly.has_stale_cache
+
+
+def test_writes_through_the_point_list_update_the_polygon():
+    poly = make_cached()
+    points = poly.points
+    points.insert(1, Point(3, 4))
+    assert list(poly.coords) == [10, 10, 3, 4, 30, 12, 20, 30]
+    assert poly.has_stale_cache
+
+    poly.update_cache()
+    points[0] = Point(1, 2)
+    assert list(poly.coords) == [1, 2, 3, 4, 30, 12, 20, 30]
+    assert poly.has_stale_cache
+
+    poly.update_cache()
+    last = points[3]
+    del points[1]
+    assert list(poly.coords) == [1, 2, 30, 12, 20, 30]
+    assert (last.x, last.y) == (20, 30)  # renumbered
+    assert poly.has_stale_cache
+
+
+def test_writes_through_a_point_drop_a_pending_transform():
+    poly = make_cached()
+    poly.transform_by(getScalingMatrix(2, 2))
+
+    poly.points[0].x = 0
+    assert list(poly.coords) == [0, 20, 60, 24, 40, 60]
+
+    # -- the written points are what the next transform starts from
+    poly.transform_by(getTranslationMatrix(0.4, 0))
+    assert list(poly.coords) == [0, 20, 60, 24, 40, 60]
+
+
+def random_matrix(rnd: random.Random) -> Matrix33:
+    kind = rnd.randrange(5)
+    if kind == 0:  # whole pixels, shifted along instead of transformed
+        return getTranslationMatrix(rnd.randint(-20, 20),
+                                    rnd.randint(-20, 20))
+    elif kind == 1:
+        return getTranslationMatrix(rnd.uniform(-20, 20),
+                                    rnd.uniform(-20, 20))
+    elif kind == 2:
+        return getRotationMatrix(rnd.uniform(-180, 180))
+    elif kind == 3:
+        return getScalingMatrix(rnd.uniform(0.5, 2), rnd.uniform(0.5, 2))
+    else:
+        return getSheeringMatrix(rnd.uniform(-0.5, 0.5),
+                                 rnd.uniform(-0.5, 0.5))
+
+
+def multiply(m1: Matrix33, m2: Matrix33) -> Matrix33:
+    return tuple(
+        tuple(sum(m1[i][k] * m2[k][j] for k in range(3)) for j in range(3))
+        for i in range(3)
+    )
+
+
+def transform_eagerly(points: List[Tuple[int, int]], M: Matrix33) \
+        -> List[int]:
+    """
+    The x, y of `points` under `M`, rounded half up.
+    """
+    return [
+        c for x, y in points for c in (
+            math.floor(x * M[0][0] + y * M[1][0] + M[2][0] + 0.5),
+            math.floor(x * M[0][1] + y * M[1][1] + M[2][1] + 0.5)
+        )
+    ]
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("vectorized", [
+    False, pytest.param(True, marks=needs_numpy)
+])
+def test_lazy_transforms_match_eager_ones(seed, vectorized, monkeypatch):
+    if not vectorized:
+        monkeypatch.setattr("rasterizer.polygon_helper.np", None)
+
+    rnd = random.Random(seed)
+    factory = PolygonFactory()
+    originals = []
+    for _ in range(8):
+        points = [(rnd.randint(-50, 50), rnd.randint(-50, 50))
+                  for _ in range(rnd.randint(3, 10))]
+        factory.create([Point(x, y) for x, y in points])
+        originals.append(points)
+
+    M = ((1, 0, 0), (0, 1, 0), (0, 0, 1))
+    for _ in range(6):
+        step = random_matrix(rnd)
+        M = multiply(M, step)
+        transformPolygons(step, factory, rasterize=False)
+
+        for poly, points in zip(factory, originals):
+            assert not poly._pointsStale
+            assert list(poly._coords) == transform_eagerly(points, M)
+
+    # -- read one by one instead of in a single pass
+    step = random_matrix(rnd)
+    M = multiply(M, step)
+    for poly in factory:
+        poly.transform_by(step)
+    for poly, points in zip(factory, originals):
+        assert list(poly.coords) == transform_eagerly(points, M)
+
+
+def test_materialize_points_bumps_only_moved_polygons():
+    factory = PolygonFactory()
+    moved = factory.create(list(TRIANGLE))
+    kept = factory.create([Point(0, 0), Point(0, 0), Point(0, 0)])
+    versions = moved.geometryVersion, kept.geometryVersion
+
+    for poly in factory:
+        poly.transform_by(getScalingMatrix(2, 3))
+    materialize_points(factory)
+
+    assert list(moved.coords) == [20, 30, 60, 36, 40, 90]
+    assert moved.geometryVersion > versions[0]
+    assert kept.geometryVersion == versions[1]
@@ -0,0 +1,478 @@
+"""
+Compares the faster rasterizers against the spans paired from
+`get_raster_lines`, on random polygons and on degenerate ones: horizontal
+edges, collinear points and repeated vertices.
+
+Run from the repository root: `python -m pytest tests`
+"""
+from array import array
+from typing import List, Optional, Tuple
+import random
+
+import pytest
+
+from primitives import Point
+from rasterizer.polygon_factory import PolygonFactory
+from rasterizer.polygon_helper import PolygonHelper
+from rasterizer.scanline.edge_table import EdgeTable
+from rasterizer.scanline.active_edge_list import ActiveEdgeList
+from rasterizer.scanline.convex import ConvexTable, get_convex_spans, \
+    get_convex_clipped_spans
+from rasterizer.scanline.scanline import get_raster_lines, get_table_spans, \
+    get_clipped_spans, get_raster_spans, fill_raster_spans
+from rasterizer.scanline.scene import SceneEdgeTable, rasterize_scene, \
+    rasterize_scene_arrays
+from rasterizer.scanline.vectorized import has_numpy, np, \
+    polygon_to_array, get_raster_spans_vectorized
+from rasterizer.span_cache import SpanCache
+
+Span = Tuple[int, int, int]
+Clip = Tuple[int, int, int, int]
+
+SEEDS = range(20)
+
+needs_numpy = pytest.mark.skipif(not has_numpy(), reason="requires NumPy")
+
+
+def make_polygon(rnd: random.Random, size: int = 40) -> PolygonHelper:
+    """
+    A random polygon of up to a dozen points on a small grid, so edges
+    often meet, with horizontal edges, collinear points and repeated
+    vertices mixed in.
+    """
+    points: List[Point] = []
+
+    for _ in range(rnd.randint(3, 12)):
+        kind = rnd.random()
+
+        if len(points) > 0 and kind < 0.15:  # repeated vertex
+            points.append(Point(points[-1].x, points[-1].y))
+        elif len(points) > 0 and kind < 0.3:  # horizontal edge
+            points.append(Point(rnd.randint(0, size), points[-1].y))
+        elif len(points) > 1 and kind < 0.45:  # collinear with the last two
+            a, b = points[-2], points[-1]
+            k = rnd.choice((-1, 2))
+            points.append(Point(a.x + k * (b.x - a.x), a.y + k * (b.y - a.y)))
+        else:
+            points.append(Point(rnd.randint(0, size), rnd.randint(0, size)))
+
+    return PolygonHelper(*points)
+
+
+def reference_spans(poly: PolygonHelper) -> List[Span]:
+    """
+    The (y, x1, x2) spans paired from `get_raster_lines`. A closed outline
+    crosses every row an even number of times.
+    """
+    table = EdgeTable.from_polygon(poly)
+    crossings = list(get_raster_lines(*table.to_lists()))
+    assert len(crossings) % 2 == 0
+
+    spans = []
+    for (x1, y1), (x2, y2) in zip(crossings[0::2], crossings[1::2]):
+        assert y1 == y2
+        spans.append((y1, x1, x2))
+
+    return spans
+
+
+def clip_spans(spans: List[Span], clip: Optional[Clip]) -> List[Span]:
+    """
+    `spans` cut to the window `clip` like `get_clipped_spans` does.
+    """
+    if clip is None:
+        return spans
+
+    x0, y0, x1, y1 = clip
+
+    return [
+        (y, max(a, x0), min(b, x1)) for y, a, b in spans
+        if y0 <= y < y1 and a < x1 and b >= x0
+    ]
+
+
+def random_clip(rnd: random.Random, size: int = 40) -> Clip:
+    x0 = rnd.randint(-5, size // 2)
+    y0 = rnd.randint(-5, size // 2)
+
+    return x0, y0, rnd.randint(x0 + 1, size + 5), rnd.randint(y0 + 1, size + 5)
+
+
+def make_polygons(rnd: random.Random, count: int) \
+        -> List[Tuple[PolygonHelper, List[Span]]]:
+    """
+    `count` random polygons along with their reference spans.
+    """
+    polys = [make_polygon(rnd) for _ in range(count)]
+
+    return [(p, reference_spans(p)) for p in polys]
+
+
+@needs_numpy
+@pytest.mark.parametrize("seed", SEEDS)
+def test_vectorized_matches_raster_lines(seed):
+    for poly, spans in make_polygons(random.Random(seed), 20):
+        got = get_raster_spans_vectorized(polygon_to_array(poly))
+        assert [tuple(s) for s in got.tolist()] == spans
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_fill_raster_spans_into_an_array(seed):
+    for poly, _ in make_polygons(random.Random(seed), 10):
+        table = EdgeTable.from_polygon(poly)
+        spans = list(get_raster_spans(*table.to_lists()))
+        flat = [v for s in spans for v in s]
+
+        # grown from empty, and from too short with stale values
+        for out in (array("i"), array("i", [-1] * max(len(flat) - 2, 0))):
+            assert fill_raster_spans(*table.to_lists(), out) == len(spans)
+            assert out.tolist() == flat
+
+        # longer than needed, the tail is left alone
+        out = array("i", [-1] * (len(flat) + 3))
+        assert fill_raster_spans(*table.to_lists(), out) == len(spans)
+        assert out.tolist() == flat + [-1] * 3
+
+
+@needs_numpy
+@pytest.mark.parametrize("seed", SEEDS)
+def test_fill_raster_spans_into_a_numpy_buffer(seed):
+    for poly, _ in make_polygons(random.Random(seed), 10):
+        table = EdgeTable.from_polygon(poly)
+        spans = list(get_raster_spans(*table.to_lists()))
+
+        out = np.full((len(spans) + 2, 3), -1, dtype=np.int32)
+        assert fill_raster_spans(*table.to_lists(), out) == len(spans)
+        assert [tuple(s) for s in out[:len(spans)].tolist()] == spans
+        assert (out[len(spans):] == -1).all()
+
+        flat = np.zeros(3 * len(spans), dtype=np.int64)
+        assert fill_raster_spans(*table.to_lists(), flat) == len(spans)
+        assert flat.tolist() == [v for s in spans for v in s]
+
+        if len(spans) > 0:
+            with pytest.raises(ValueError):
+                fill_raster_spans(*table.to_lists(), out[:len(spans) - 1])
+
+        if len(spans) > 1:
+            with pytest.raises(ValueError):  # columns of a wider buffer
+                wide = np.zeros((len(spans), 6), dtype=np.int32)
+                fill_raster_spans(*table.to_lists(), wide[:, :3])
+
+
+def edge_order(aet: ActiveEdgeList) -> List[Tuple[int, ...]]:
+    return [
+        (st.x, st.edge.start.x, st.edge.start.y, st.edge.end.x, st.edge.end.y)
+        for st in aet
+    ]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_seed_matches_sweep(seed):
+    """
+    A list seeded on a row holds the edges in the order walking every row
+    below leaves them in, ties included, since the expiry depends on it.
+    """
+    for poly, _ in make_polygons(random.Random(seed), 10):
+        table = EdgeTable.from_polygon(poly)
+        keys, buckets = table.to_lists()
+        if len(keys) <= 0:
+            continue
+
+        walked = ActiveEdgeList()
+        bi = 0
+        y_min, y_max = table.y_range()
+
+        for y in range(y_min, y_max + 1):
+            seeded = ActiveEdgeList()
+            seeded.seed(table.active_at(y), y)
+            assert edge_order(seeded) == edge_order(walked)
+
+            walked.expire(y)
+            if bi < len(keys) and keys[bi] == y:
+                walked.insert(buckets[bi])
+                bi += 1
+            walked.advance()
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_table_spans_over_row_ranges(seed):
+    rnd = random.Random(seed)
+
+    for poly, spans in make_polygons(rnd, 10):
+        table = EdgeTable.from_polygon(poly)
+        assert list(get_table_spans(table)) == spans
+
+        for _ in range(5):
+            y0 = rnd.randint(-5, 45)
+            y1 = rnd.randint(y0, 50)
+
+            assert list(get_table_spans(table, y0, y1)) == \
+                [s for s in spans if y0 <= s[0] < y1]
+
+            clip = random_clip(rnd)
+            assert list(get_clipped_spans(table, clip)) == \
+                clip_spans(spans, clip)
+
+        # the table is left untouched
+        assert list(get_table_spans(table)) == spans
+
+
+@pytest.mark.parametrize("vectorized", [
+    False, pytest.param(True, marks=needs_numpy)
+])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_scene_matches_raster_lines(seed, vectorized):
+    rnd = random.Random(seed)
+    polys = make_polygons(rnd, rnd.randint(1, 10))
+    scene = SceneEdgeTable([EdgeTable.from_polygon(p) for p, _ in polys])
+
+    for clip in (None, random_clip(rnd), (0, 100, 40, 200)):
+        got = rasterize_scene(scene, clip, vectorized=vectorized)
+
+        assert got == [clip_spans(spans, clip) for _, spans in polys]
+
+
+@needs_numpy
+@pytest.mark.parametrize("seed", SEEDS)
+def test_scene_arrays_are_grouped_by_polygon(seed):
+    rnd = random.Random(seed)
+    polys = make_polygons(rnd, rnd.randint(1, 10))
+    scene = SceneEdgeTable([EdgeTable.from_polygon(p) for p, _ in polys])
+    clip = random_clip(rnd)
+
+    spans, bounds = rasterize_scene_arrays(scene, clip)
+
+    assert len(bounds) == len(polys) + 1
+    for i, (_, ref) in enumerate(polys):
+        part = spans[bounds[i]:bounds[i + 1]].tolist()
+
+        assert all(pid == i for _, _, _, pid in part)
+        assert [tuple(s[:3]) for s in part] == clip_spans(ref, clip)
+
+
+def fresh_cache(poly: PolygonHelper, clip: Optional[Clip]) \
+        -> Tuple[List[Span], List[Span]]:
+    """
+    The fill and outline spans of a copy of `poly` rasterized from scratch.
+    """
+    factory = PolygonFactory()
+    factory.clipRect = clip
+
+    copy = factory.create(list(poly.points))
+    copy.outlineThickness = poly.outlineThickness
+    copy.update_cache()
+
+    return list(copy.cachedLines), list(copy.cachedOutline)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_splice_replaces_rows(seed):
+    rnd = random.Random(seed)
+    (_, a), (_, b) = make_polygons(rnd, 2)
+
+    for _ in range(10):
+        y0 = rnd.randint(-5, 45)
+        y1 = rnd.randint(y0, 50)
+        cache = SpanCache.from_spans(a)
+        cache.splice(y0, y1, [s for s in b if y0 <= s[0] < y1])
+
+        assert list(cache) == sorted(
+            [s for s in a if not y0 <= s[0] < y1] +
+            [s for s in b if y0 <= s[0] < y1],
+            key=lambda s: s[0]
+        )
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_move_point_splices_the_same_spans(seed):
+    rnd = random.Random(seed)
+    factory = PolygonFactory()
+    factory.clipRect = None if seed % 2 == 0 else random_clip(rnd)
+
+    for poly, _ in make_polygons(rnd, 5):
+        poly = factory.create(list(poly.points))
+        poly.outlineThickness = rnd.choice((0, 1, 3))
+        poly.update_cache()
+
+        for _ in range(5):
+            idx = rnd.randrange(len(poly.points))
+            poly.move_point(idx, rnd.randint(0, 40), rnd.randint(0, 40))
+
+            assert poly.has_cache
+            assert (list(poly.cachedLines), list(poly.cachedOutline)) == \
+                fresh_cache(poly, factory.clipRect)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_shift_moves_every_span(seed):
+    rnd = random.Random(seed)
+    (_, spans), = make_polygons(rnd, 1)
+    dx, dy = rnd.randint(-20, 20), rnd.randint(-20, 20)
+
+    cache = SpanCache.from_spans(spans)
+    cache.shift(dx, dy)
+
+    assert list(cache) == [(y + dy, a + dx, b + dx) for y, a, b in spans]
+
+
+def cache_rows(cache: SpanCache) -> List[Tuple[int, List[int]]]:
+    return [(y, list(row)) for y, row in cache.rows()]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("vectorized", [
+    False, pytest.param(True, marks=needs_numpy)
+])
+def test_clipped_matches_clipped_rasterization(seed, vectorized,
+                                               monkeypatch):
+    if not vectorized:
+        monkeypatch.setattr("rasterizer.span_cache.np", None)
+
+    rnd = random.Random(seed)
+    poly, spans = make_polygons(rnd, 1)[0]
+    poly.outlineThickness = rnd.choice((1, 3))
+    lines, outline = fresh_cache(poly, None)
+    lines, outline = SpanCache.from_spans(lines), SpanCache.from_spans(outline)
+
+    clips = [random_clip(rnd) for _ in range(10)]
+    clips += [
+        (100, 100, 120, 120),  # past the polygon
+        (-30, 0, -10, 40),     # beside it, on the same rows
+        (-60, -60, 100, 100),  # around it
+    ]
+
+    for clip in clips:
+        fill, stroke = fresh_cache(poly, clip)
+        fill, stroke = SpanCache.from_spans(fill), SpanCache.from_spans(stroke)
+
+        assert list(lines.clipped(clip)) == list(fill) == clip_spans(spans,
+                                                                     clip)
+        assert cache_rows(lines.clipped(clip)) == cache_rows(fill)
+        assert list(outline.clipped(clip, False)) == list(stroke)
+        assert cache_rows(outline.clipped(clip, False)) == cache_rows(stroke)
+
+    assert len(lines.clipped((100, 100, 120, 120))) == 0
+    assert lines.clipped((-60, -60, 100, 100)) is lines
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_translate_shifts_the_same_spans(seed):
+    rnd = random.Random(seed)
+    factory = PolygonFactory()
+    factory.clipRect = None if seed % 2 == 0 else (-60, -60, 100, 100)
+    shifted = 0
+
+    for poly, _ in make_polygons(rnd, 5):
+        poly = factory.create(list(poly.points))
+        poly.outlineThickness = rnd.choice((0, 1, 3))
+        poly.update_cache()
+
+        for _ in range(5):
+            if rnd.random() < 0.3:  # the outline is stroked again
+                poly.outlineThickness = rnd.choice((0, 1, 2, 4))
+
+            shifted += poly.translate(rnd.randint(-30, 30),
+                                      rnd.randint(-30, 30))
+            poly.update_cache()
+
+            assert (list(poly.cachedLines), list(poly.cachedOutline)) == \
+                fresh_cache(poly, factory.clipRect)
+            assert list(poly.get_cached_outline()) == \
+                fresh_cache(poly, factory.clipRect)[1]
+
+    # some caches were shifted, not rasterized again
+    assert shifted > 0
+
+
+def test_translate_strokes_a_thicker_outline_again():
+    factory = PolygonFactory()
+    poly = factory.create([Point(10, 10), Point(30, 12), Point(20, 30)])
+    poly.outlineThickness = 2
+    poly.update_cache()
+
+    poly.outlineThickness = 4
+    assert poly.translate(20, 5)
+
+    assert list(poly.get_cached_outline()) == fresh_cache(poly, None)[1]
+
+
+def make_convex_polygon(rnd: random.Random, size: int = 40) \
+        -> PolygonHelper:
+    """
+    The convex hull of random points, either way around, with collinear
+    points and repeated vertices put on its edges.
+    """
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    hull: List[Tuple[int, int]] = []
+    while len(hull) < 3:  # until the points are not all on one line
+        pts = sorted(set(
+            (rnd.randint(0, size), rnd.randint(0, size))
+            for _ in range(rnd.randint(3, 15))
+        ))
+
+        hull = []
+        for part in (pts, pts[::-1]):  # monotone chain
+            start = len(hull)
+            for p in part:
+                while len(hull) - start >= 2 and \
+                        cross(hull[-2], hull[-1], p) <= 0:
+                    hull.pop()
+                hull.append(p)
+            hull.pop()
+
+    points: List[Point] = []
+    for i, (x, y) in enumerate(hull):
+        points.append(Point(x, y))
+
+        nx, ny = hull[(i + 1) % len(hull)]
+        kind = rnd.random()
+        if kind < 0.2:
+            points.append(Point(x, y))
+        elif kind < 0.4 and (nx - x) % 2 == 0 and (ny - y) % 2 == 0:
+            points.append(Point((x + nx) // 2, (y + ny) // 2))
+
+    if rnd.random() < 0.5:
+        points.reverse()
+
+    return PolygonHelper(*points)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_convex_walker_matches_raster_lines(seed):
+    rnd = random.Random(seed)
+
+    for _ in range(20):
+        poly = make_convex_polygon(rnd)
+        assert poly.topology.convex
+
+        table = ConvexTable.from_polygon(poly)
+        spans = reference_spans(poly)
+
+        assert list(get_convex_spans(table)) == spans
+        assert list(poly.get_convex_spans()) == spans
+
+        for _ in range(5):
+            clip = random_clip(rnd)
+
+            assert list(get_convex_clipped_spans(table, clip)) == \
+                clip_spans(spans, clip)
+            assert list(poly.get_convex_spans(clip)) == \
+                clip_spans(spans, clip)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_convex_topology_of_random_polygons(seed):
+    """
+    Random polygons found convex are rasterized the same by the walker.
+    """
+    convex = 0
+
+    for poly, spans in make_polygons(random.Random(seed), 50):
+        if poly.topology.convex:
+            assert list(poly.get_convex_spans()) == spans
+            convex += 1
+
+    assert convex > 0
@@ -1,8 +1,15 @@
+from typing import List, Optional, Tuple, Union
+
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtGui import QPainter, QPen, QColor, QPaintEvent
+from PyQt5.QtGui import QPainter, QPen, QColor, QImage, QPaintEvent, \
+    QResizeEvent
 from PyQt5.QtCore import pyqtSignal, QPoint
+from PyQt5 import sip
 
 from rasterizer.polygon_factory import PolygonFactory
+from rasterizer.span_buffer import SpanBuffer
+from rasterizer.span_cache import SpanCache
+from rasterizer.framebuffer import Framebuffer, has_numpy
 
 
 class RasterSurface(QWidget):
@@ -22,6 +29,92 @@ class RasterSurface(QWidget):
 
         self.polygonFactory = polygonFactory
 
+        # skip the parts of fills hidden behind opaque polygons; only when
+        # drawing span by span, the framebuffer composites them faster than
+        # they are culled
+        self.occlusionCulling: bool = True
+
+        # composite the fills with NumPy and draw them as a single image
+        self.framebufferCompositing: bool = True
+        self._framebuffer: Optional[Framebuffer] = None
+
+        # the clip window grows in steps of this many pixels, so resizing
+        # by a few pixels at a time does not rasterize anything again
+        self.clipStep: int = 128
+
+    def resizeEvent(self, event: QResizeEvent):
+        # only rows 1 to height are shown, see `paintEvent`; the spans past
+        # the padded edges are cut when drawn
+        size = event.size()
+        step = max(self.clipStep, 1)
+        self.polygonFactory.update_clip((
+            0,
+            1,
+            -(-size.width() // step) * step,
+            -(-size.height() // step) * step + 1
+        ))
+
+        super().resizeEvent(event)
+
+    def visibleLines(self) -> List[Optional[SpanCache]]:
+        """
+        Walks the polygons front to back and returns, for each one, the
+        parts of its cached spans not hidden by the opaque (alpha 255)
+        fills in front of it, or None when it has no fill to draw.
+        """
+        covered = SpanBuffer()
+        visible: List[Optional[SpanCache]] = []
+
+        for poly in self.polygonFactory:
+            if len(poly.points) <= 0 or not poly.has_cache or \
+                    poly.fillColor[3] == 0:
+                visible.append(None)
+                continue
+
+            visible.append(covered.visible_spans(poly.cachedLines))
+
+            if poly.fillColor[3] == 255:
+                covered.insert_spans(poly.cachedLines)
+
+        return visible
+
+    @staticmethod
+    def fillSpans(
+        painter: QPainter,
+        lines: Union[SpanCache, List[Tuple[int, int, int]]],
+        height: int,
+        color: QColor
+    ) -> None:
+        """
+        Fills (y, x1, x2) spans one rectangle each, reading a `SpanCache`
+        row by row.
+        """
+        if isinstance(lines, SpanCache):
+            for y, xs in lines.rows():
+                y = height - y
+                for i in range(0, len(xs), 2):
+                    painter.fillRect(xs[i], y, xs[i + 1] - xs[i], 1, color)
+        else:
+            for y, x1, x2 in lines:
+                painter.fillRect(x1, height - y, x2 - x1, 1, color)
+
+    @staticmethod
+    def framebufferImage(framebuffer: Framebuffer) -> QImage:
+        """
+        Wraps the pixels of `framebuffer` in a QImage without copying them,
+        so whatever is painted onto the image lands in the framebuffer.
+        """
+        pixels = framebuffer.pixels
+
+        # a non-const pointer, so painting does not detach the image
+        return QImage(
+            sip.voidptr(pixels.ctypes.data),
+            pixels.shape[1],
+            pixels.shape[0],
+            pixels.strides[0],
+            QImage.Format_RGBA8888_Premultiplied
+        )
+
     def paintEvent(self, event: QPaintEvent):
         height = self.height()
 
@@ -33,33 +126,79 @@ class RasterSurface(QWidget):
 
         self.renderBegin.emit(painter)
 
-        for poly in reversed(self.polygonFactory):
+        # polygons changed or transformed since they were cached, in one
+        # sweep; cheap when none were
+        self.polygonFactory.update_all_cache(staleOnly=True)
+
+        # fills are composited into a transparent framebuffer, outlines are
+        # drawn into it in between, and it is blended onto the widget once
+        framebuffer = self.framebufferCompositing and has_numpy()
+
+        if self.occlusionCulling and not framebuffer:
+            fills = self.visibleLines()
+        else:
+            fills = [poly.cachedLines if poly.has_cache else None
+                     for poly in self.polygonFactory]
+
+        if framebuffer:
+            if self._framebuffer is None:
+                self._framebuffer = Framebuffer(self.width(), height)
+            else:
+                self._framebuffer.resize(self.width(), height)
+
+            self._framebuffer.clear()
+            image = self.framebufferImage(self._framebuffer)
+            target = QPainter(image)
+            pen = target.pen()
+        else:
+            target = painter
+
+        for poly, lines in reversed(list(zip(self.polygonFactory, fills))):
             if len(poly.points) > 0:
                 r, g, b, a = poly.fillColor
-                if poly.has_cache and a != 0:
-                    col = QColor(r, g, b, a)
-                    pen.setColor(blockColor)
-                    painter.setPen(pen)
-
-                    for y, x1, x2 in poly.cachedLines:
-                        y = height - y
-
-                        painter.fillRect(
-                            x1,
-                            y,
-                            x2 - x1,
-                            1,
-                            col
+                if lines is not None and a != 0:
+                    if framebuffer:
+                        self._framebuffer.composite_spans(
+                            lines,
+                            poly.fillColor
                         )
+                    else:
+                        col = QColor(r, g, b, a)
+                        pen.setColor(blockColor)
+                        painter.setPen(pen)
+
+                        self.fillSpans(painter, lines, height, col)
 
                 r, g, b, a = poly.outlineColor
                 if poly.outlineThickness > 0 and a != 0:
-                    pen.setColor(QColor(r, g, b, a))
-                    pen.setWidth(poly.outlineThickness)
-                    painter.setPen(pen)
-
-                    points = [QPoint(i.x, height - i.y) for i in poly.points]
+                    if poly.has_cache:
+                        outline = poly.get_cached_outline()
+                    else:
+                        outline = None
+
+                    if outline is None:
+                        # too few points to be rasterized yet
+                        pen.setColor(QColor(r, g, b, a))
+                        pen.setWidth(poly.outlineThickness)
+                        target.setPen(pen)
+
+                        points = [
+                            QPoint(i.x, height - i.y) for i in poly.points
+                        ]
+
+                        target.drawPolygon(points[0], *points[1:])
+                    elif framebuffer:
+                        self._framebuffer.composite_spans(
+                            outline,
+                            poly.outlineColor
+                        )
+                    else:
+                        self.fillSpans(
+                            painter, outline, height, QColor(r, g, b, a)
+                        )
 
-                    painter.drawPolygon(points[0], *points[1:])
+        if framebuffer:
+            target.end()
+            painter.drawImage(0, 0, image)
 
         self.renderEnd.emit(painter)